@@ -1,12 +1,16 @@
-from typing import Iterable, Sequence, Mapping
+from typing import Iterable, Sequence, Mapping, Optional
+from pathlib import Path
 import os
+import sys
 import json
 
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'lexicon'))
+
 class VoxEmotionData:
     """ A class to store data from Vox Podcasts. Acts as a dataloader
     """
 
-    def __init__(self, data_path : str):
+    def __init__(self, data_path : str, compiled_path : Optional[str] = None):
         self.labels = {
             "anger": 0,
             "anticipation": 1,
@@ -20,7 +24,10 @@ class VoxEmotionData:
             "trust": 9
         }
 
-        self.data = self.load_data(data_path + "{}-NRC-Emotion-Lexicon.txt")
+        if compiled_path:
+            self.data = self.load_compiled(compiled_path)
+        else:
+            self.data = self.load_data(data_path + "{}-NRC-Emotion-Lexicon.txt")
 
     def load_data(self, data_path_fs : str) -> Iterable[tuple[Sequence[str], int]]:
         """ Load labeled data from the provided file path
@@ -40,3 +47,19 @@ class VoxEmotionData:
             #         out.append((word, y))
         return  out
 
+    def load_compiled(self, compiled_path : str) -> Iterable[tuple[Sequence[str], int]]:
+        """ Same examples as load_data, read from the memory-mapped binary lexicon
+        built by code/lexicon/nrc_lexicon.py (words come in sorted order)
+        """
+        from nrc_lexicon import CompiledLexicon
+
+        lexicon = CompiledLexicon(compiled_path)
+        words = [w for w, keep in zip(lexicon.words(), lexicon.in_emotion_lexicon()) if keep]
+        bits = lexicon.emotion_bits[lexicon.in_emotion_lexicon()]
+
+        out = []
+        for label, y in self.labels.items():
+            values = (bits >> y) & 1
+            out.extend(([word, str(v)], y) for word, v in zip(words, values.tolist()))
+        lexicon.close()
+        return out
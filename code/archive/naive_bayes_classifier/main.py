@@ -1,4 +1,6 @@
 import argparse
+from data import VoxEmotionData
+from naive_bayes_classifier import NBBaseline
 
 parser = argparse.ArgumentParser()
 
@@ -7,7 +9,7 @@ parser.add_argument("--data", type=str, help="path to the data folder")
 parser.add_argument("--task", type=str, help="task (emotion or VAD)")
 parser.add_argument("--model", type=str, help="naive bayes or transformer")
 parser.add_argument("--save", type=str, help="path to model file to save")
-parser.add_argument("--load", type=str, help="path to model file to load")
+parser.add_argument("--load", type=str, help="path to model file to load (with --data, the data is added to it)")
 
 parser.add_argument("--measure", type=str, help="report the provided measure (acc, precision, recall, f1) over the dev set")
 parser.add_argument("--label", action="store_true", help="print out the predicted label of each datapoint in test set, newline separated")
@@ -16,9 +18,26 @@ args = parser.parse_args()
 
 # data pathway is ."../data/NRC-Emotion-Lexicon/OneFilePerEmotion/"
 
+dataset = None
 if args.task == "emotion":
-    dataset = VOXData(args.data)
+    dataset = VoxEmotionData(args.data) if args.data else None
 elif args.task == "vad":
-    dataset = AuthorIDData(args.data)
+    parser.error("there is no VAD dataset loader yet")
+
+if args.load:
+    model = NBBaseline.load(args.load)
+    if dataset is not None:
+        model.partial_fit(dataset.data) # update the saved counts instead of retraining
+elif dataset is not None:
+    model = NBBaseline(dataset.data)
+else:
+    parser.error("provide --data to train or --load to use a saved model")
+
+if args.save:
+    model.save(args.save)
+
+if args.label and dataset is not None:
+    for y in model.label_batch([tokens for tokens, _ in dataset.data]):
+        print(y)
 
 
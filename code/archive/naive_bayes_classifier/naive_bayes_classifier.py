@@ -1,46 +1,102 @@
 import numpy as np
-from typing import Sequence, Mapping, Iterable
+from itertools import chain, repeat
+from scipy import sparse
+from typing import Sequence, Mapping, Iterable, Optional
 from data import *
 
 class NBBaseline:
     # Input is iterable of tuple. where the tuple is (sequence of words) and (classification of that word)
-    # Right now. data is not in the form... its just in a list of sequence of words.
+    # Words are encoded to ids once; the model keeps raw (classes x vocab) word counts so it can be
+    # updated with partial_fit, and derives the smoothed log-probabilities from them only when needed.
 
-    def __init__(self, train_data : Iterable[tuple[Sequence[str], int]]):
-        self.classes = set([c for _, c in train_data])
-        self.smoothed_totals = {}
+    def __init__(self, train_data : Optional[Iterable[tuple[Sequence[str], int]]] = None):
+        self.vocab = {}
+        self.classes = np.empty(0, dtype=np.int64)
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self._log_probs = None
+        if train_data is not None:
+            self.partial_fit(train_data)
 
-        self.vocab = set()
-        for t in train_data:
-            self.vocab.update(t[0])
+    def encode(self, docs : Iterable[Sequence[str]]) -> sparse.csr_matrix:
+        """ Sparse (docs x vocab + 1) word counts; unknown words go to the last column
+        """
+        docs = list(docs)
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        unknown = len(self.vocab)
+        ids = np.fromiter(map(self.vocab.get, chain.from_iterable(docs), repeat(unknown)),
+                          dtype=np.int64, count=int(lengths.sum()))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        X = sparse.csr_matrix((np.ones(len(ids), dtype=np.float64), ids, indptr),
+                              shape=(len(docs), unknown + 1))
+        X.sum_duplicates()
+        return X
 
-        self.ulm = {} # key = class, value = log-frequency map of words in that class
-        for c in self.classes: # split data into classes
-            class_data = [t[0] for t in train_data if t[1] == c] # a 2d list of all the words in the class, split by sentence
-            self.ulm[c] = self.get_logfreqs(c, [item for sublist in class_data for item in sublist]) # flatten list
+    def partial_fit(self, train_data : Iterable[tuple[Sequence[str], int]]):
+        """ Add a batch of (words, class) examples; new words and classes extend the model
+        """
+        train_data = list(train_data)
+        for w in chain.from_iterable(t[0] for t in train_data):
+            self.vocab.setdefault(w, len(self.vocab))
 
-    def get_logfreqs(self, c: int, data : Iterable[str]) -> Mapping[str, int]:
-        total = 0
-        counts = {}
-        for w in data:
-            counts[w] = counts.get(w, 0) + 1
-            total += 1
-        smoothed_total = total + len(self.vocab) # smoothed using laplace smoothing
-        self.smoothed_totals[c] = smoothed_total # store in class-specific dictionary for unknown words
+        labels = np.asarray([c for _, c in train_data], dtype=np.int64)
+        new_classes = np.setdiff1d(labels, self.classes)
+        if len(new_classes):
+            self.classes = np.concatenate([self.classes, new_classes])
+            self.counts = np.vstack([self.counts, np.zeros((len(new_classes), self.counts.shape[1]), dtype=np.int64)])
+            order = np.argsort(self.classes)
+            self.classes, self.counts = self.classes[order], self.counts[order]
+        if self.counts.shape[1] < len(self.vocab):
+            self.counts = np.hstack([self.counts, np.zeros((len(self.classes), len(self.vocab) - self.counts.shape[1]), dtype=np.int64)])
 
-        logprobs = {}
-        for w in self.vocab:
-            smoothed_count = counts.get(w, 0) + 1 # second part to laplace smoothing
-            logprobs[w] = np.log(smoothed_count / smoothed_total)
+        X = self.encode([t[0] for t in train_data])
+        self.fit_counts(X, np.searchsorted(self.classes, labels))
 
-        return logprobs
+    def fit_counts(self, X : sparse.csr_matrix, y : np.ndarray):
+        """ Add a count matrix with class positions (indexes into self.classes) to the model
+        """
+        Y = sparse.csr_matrix((np.ones(len(y)), (y, np.arange(len(y)))),
+                              shape=(len(self.classes), X.shape[0]))
+        self.counts += np.asarray((Y @ X).todense())[:, :len(self.vocab)].astype(np.int64)
+        self._log_probs = None
+
+    @property
+    def smoothed_totals(self) -> np.ndarray:
+        return self.counts.sum(axis=1) + len(self.vocab) # smoothed using laplace smoothing
+
+    @property
+    def log_probs(self) -> np.ndarray:
+        """ (classes x vocab + 1) smoothed log-probabilities; the extra column scores
+        words outside the vocab. Recomputed after the counts change.
+        """
+        if self._log_probs is None:
+            log_probs = np.log(np.hstack([self.counts + 1, np.ones((len(self.classes), 1))]))
+            self._log_probs = log_probs - np.log(self.smoothed_totals)[:, None]
+        return self._log_probs
+
+    def label_batch(self, docs : Iterable[Sequence[str]]) -> np.ndarray:
+        """ Most likely class of every document, from one sparse matrix product
+        """
+        log_likelihoods = self.encode(docs) @ self.log_probs.T # (docs x classes)
+        return self.classes[np.argmax(log_likelihoods, axis=1)]
 
     def label(self, data : Iterable[str]) -> int:
-        log_likelihoods = {}
-        for c in self.classes:
-            log_likelihood = 0
-            for w in data:
-                log_likelihood += self.ulm[c].get(w, np.log(1 / self.smoothed_totals[c])) # default log-frequency of unknown words
-            log_likelihoods[c] = log_likelihood
-
-        return max(log_likelihoods, key=log_likelihoods.get)
+        return self.label_batch([list(data)])[0].item()
+
+    def save(self, path : str):
+        """ Write counts, classes and vocab to one compressed .npz file
+        """
+        words = "\0".join(self.vocab).encode("utf-8") # vocab is in id order
+        dtype = np.uint32 if self.counts.size == 0 or self.counts.max() < 2 ** 32 else np.int64
+        with open(path, "wb") as f:
+            np.savez_compressed(f, classes=self.classes, counts=self.counts.astype(dtype),
+                                vocab=np.frombuffer(words, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path : str) -> "NBBaseline":
+        model = cls()
+        with np.load(path) as f:
+            model.classes = f["classes"].astype(np.int64)
+            model.counts = f["counts"].astype(np.int64)
+            words = f["vocab"].tobytes().decode("utf-8")
+        model.vocab = {w: i for i, w in enumerate(words.split("\0"))} if words else {}
+        return model
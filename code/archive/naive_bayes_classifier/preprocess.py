@@ -1,12 +1,15 @@
 from pathlib import Path
 from typing import List, Tuple, Dict, Set
 import re
-from docx import Document
+import sys
 import nltk
-from nltk.corpus import stopwords
 from nltk.tokenize import sent_tokenize
 import pickle
 
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'shared'))
+from transcript_loader import load_transcripts
+from text_tokenizer import english_stop_words
+
 def setup_nltk():
     """Download required NLTK data if not already present."""
     try:
@@ -27,7 +30,7 @@ def load_nrc_lexicon(negative_words: Set[str], neutral_words: Set[str]) -> Dict[
 
 def tokenize_sentence(sentence: str, lexicon: Dict[str, int]) -> List[str]:
     """Convert a sentence into a list of tokens."""
-    stop_words = set(stopwords.words('english'))
+    stop_words = english_stop_words()  # built once, not per sentence
 
     # Clean the text
     sentence = re.sub(r'\W+', ' ', sentence)
@@ -56,31 +59,19 @@ def process_documents_for_naive_bayes(directory: str, lexicon: Dict[str, int]) -
     """
     setup_nltk()
     training_data = []
-    directory_path = Path(directory)
-
-    if not directory_path.exists():
-        raise FileNotFoundError(f"Directory not found: {directory}")
-
-    for filepath in directory_path.glob("*.docx"):
-        try:
-            # Process document
-            doc = Document(filepath)
-            full_text = " ".join(paragraph.text for paragraph in doc.paragraphs)
-
-            # Split into sentences
-            sentences = sent_tokenize(full_text)
 
-            # Process each sentence
-            for sentence in sentences:
-                tokens = tokenize_sentence(sentence, lexicon)
-                if tokens and len(tokens) >= 3:  # Only add if we have enough tokens
-                    class_label = classify_sentence(tokens, lexicon)
-                    training_data.append((tokens, class_label))
+    for transcript in load_transcripts(directory):
+        # Split into sentences
+        sentences = sent_tokenize(transcript.text)
 
-            print(f"Processed {filepath.name}")
+        # Process each sentence
+        for sentence in sentences:
+            tokens = tokenize_sentence(sentence, lexicon)
+            if tokens and len(tokens) >= 3:  # Only add if we have enough tokens
+                class_label = classify_sentence(tokens, lexicon)
+                training_data.append((tokens, class_label))
 
-        except Exception as e:
-            print(f"Error processing {filepath.name}: {str(e)}")
+        print(f"Processed {transcript.name}")
 
     return training_data
 
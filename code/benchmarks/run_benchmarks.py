@@ -0,0 +1,394 @@
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+for module_dir in ['code/transformers', 'code/lexicon', 'code/shared', 'data/bert_labels']:
+    sys.path.append(str(REPO_DIR / module_dir))
+
+from tiny_model import COMMON_WORDS, build_tiny_model
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+ARTICLES_CSV = REPO_DIR / 'data' / 'vox_articles' / '2024_all_vox_articles.csv'
+TRANSCRIPT_DIR = REPO_DIR / 'data' / 'vox_podcasts' / '2024'
+
+# Same format as the scraped article datetimes
+VOX_DATETIME_FORMAT = "%B %d, %Y, %I:%M %p"
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident memory so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory right now, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * resource.getpagesize() / 1024 ** 2
+
+
+class RssSampler:
+    """Peak resident memory while a block runs, sampled every few milliseconds.
+
+    start is the RSS on entry and peak the largest sample, so peak - start
+    is what the block itself added. Without /proc (macOS) only the
+    process-wide high-water mark is known: peak is then that cumulative
+    figure and start equals it, so no growth is reported.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start = self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self) -> 'RssSampler':
+        rss = current_rss_mb()
+        if rss is not None:
+            self.start = self.peak = rss
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._thread is None:
+            self.start = self.peak = peak_rss_mb()
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+@dataclass
+class StageResult:
+    stage: str
+    seconds: float
+    docs: int
+    tokens: int = 0
+    peak_rss_mb: float = 0.0      # highest RSS sampled during the stage
+    rss_growth_mb: float = 0.0    # peak_rss_mb minus the RSS the stage started at
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        out['docs_per_sec'] = self.docs / self.seconds if self.seconds > 0 else None
+        out['tokens_per_sec'] = self.tokens / self.seconds if self.seconds > 0 and self.tokens else None
+        return out
+
+
+class Benchmark:
+    """Times pipeline stages (best of `repeat` runs) and collects their results."""
+
+    def __init__(self, repeat: int = 1):
+        self.repeat = repeat
+        self.results: List[StageResult] = []
+
+    def run(self, stage: str, fn: Callable[[], Any], docs: int,
+            tokens: Optional[Callable[[Any], int]] = None,
+            extra: Optional[Callable[[Any], Dict[str, Any]]] = None, **params) -> Any:
+        """Run fn repeat times; tokens(result) gives the tokens it processed and
+        extra(result) any parameters only known after the run."""
+        best = float('inf')
+        with RssSampler() as rss:
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                value = fn()
+                best = min(best, time.perf_counter() - start)
+        if extra:
+            params.update(extra(value))
+        result = StageResult(stage, best, docs, int(tokens(value)) if tokens else 0,
+                             round(rss.peak, 1), round(rss.peak - rss.start, 1), params)
+        self.results.append(result)
+
+        line = result.to_dict()
+        rate = f"{line['docs_per_sec']:10,.1f} docs/s"
+        if line['tokens_per_sec']:
+            rate += f" {line['tokens_per_sec']:12,.0f} tokens/s"
+        print(f"  {stage:<32}{best:8.3f}s {rate:<38} peak RSS {result.peak_rss_mb:7.1f} MB "
+              f"(+{result.rss_growth_mb:.1f})")
+        return value
+
+    def skip(self, stage: str, reason: str) -> None:
+        self.results.append(StageResult(stage, 0.0, 0, params={'skipped': reason}))
+        print(f"  {stage:<32} skipped: {reason}")
+
+
+def synthetic_corpus(n_docs: int, mean_words: int = 900, seed: int = 0) -> pd.DataFrame:
+    """Vox-like articles: skewed lengths, sentences, dates through 2024, a few dozen authors.
+
+    Words come from the tiny model's vocabulary plus random out-of-vocabulary
+    filler, so tokenization exercises both whole words and WordPiece pieces.
+    """
+    rng = np.random.default_rng(seed)
+    filler = [''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), rng.integers(3, 11)))
+              for _ in range(2000)]
+    words = np.array(list(COMMON_WORDS) + filler)
+    # Zipf-like weights so a few words dominate, as in real text
+    weights = 1.0 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+
+    lengths = np.maximum(20, rng.lognormal(np.log(mean_words), 0.6, n_docs).astype(int))
+    texts = []
+    for length in lengths:
+        tokens = rng.choice(words, size=length, p=weights)
+        sentences = np.array_split(tokens, max(1, length // 20))
+        texts.append(' '.join(' '.join(s).capitalize() + '.' for s in sentences))
+
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 366 * 24 * 60, n_docs), unit='min')
+    return pd.DataFrame({
+        'url': [f"https://www.vox.com/benchmark/{i}" for i in range(n_docs)],
+        'title': [' '.join(rng.choice(words[:80], 6)).title() for _ in range(n_docs)],
+        'author': [f"Author {a}" for a in rng.integers(0, 40, n_docs)],
+        'datetime': dates.strftime(VOX_DATETIME_FORMAT),
+        'text': texts,
+    })
+
+
+def sampled_corpus(n_docs: int, seed: int = 0) -> pd.DataFrame:
+    """Up to n_docs real articles and podcast transcripts, whichever exist locally."""
+    from transcript_loader import load_transcripts
+    frames = []
+    if ARTICLES_CSV.exists():
+        articles = pd.read_csv(ARTICLES_CSV)
+        frames.append(articles.sample(min(n_docs, len(articles)), random_state=seed))
+    if TRANSCRIPT_DIR.exists():
+        transcripts = load_transcripts(str(TRANSCRIPT_DIR))
+        frames.append(pd.DataFrame({
+            'url': [t.name for t in transcripts],
+            'title': [t.title for t in transcripts],
+            'author': None,
+            'datetime': [t.date.strftime(VOX_DATETIME_FORMAT) if t.date else None for t in transcripts],
+            'text': [t.text for t in transcripts],
+        }))
+    if not frames:
+        raise SystemExit(f"No articles at '{ARTICLES_CSV}' or transcripts in '{TRANSCRIPT_DIR}'")
+    df = pd.concat(frames, ignore_index=True)
+    return df.sample(min(n_docs, len(df)), random_state=seed).reset_index(drop=True)
+
+
+def bench_transformer(bench: Benchmark, texts: List[str], model: str, backends: List[str],
+                      batch_sizes: List[int], work_dir: Path) -> Any:
+    """Tokenization, chunking and inference per backend and batch size; returns chunk scores."""
+    import torch
+    from sentiment_engine import PaddingStats, SentimentEngine
+
+    cpu = torch.device('cpu')
+    engine = SentimentEngine(model, device=cpu)
+    n = len(texts)
+    bench.run('tokenization', lambda: engine.tokenizer(texts)['input_ids'], n,
+              tokens=lambda ids: sum(map(len, ids)))
+    windows, _ = bench.run('chunking', lambda: engine.chunk_documents(texts), n,
+                           tokens=lambda out: sum(map(len, out[0])))
+
+    scores = None
+    for backend in backends:
+        for batch_size in batch_sizes:
+            stage = f"inference[{backend},bs={batch_size}]"
+            try:
+                runner = SentimentEngine(model, batch_size=batch_size, device=cpu, backend=backend,
+                                         onnx_path=str(work_dir / 'model.onnx'))
+            except ImportError as e:
+                bench.skip(stage, str(e))
+                continue
+            runner.predict_texts(texts[:1], show_progress=False)
+
+            def score():
+                runner.padding = PaddingStats()
+                return runner.score_documents(texts, show_progress=False)
+
+            result = bench.run(stage, score, n, tokens=lambda _: runner.padding.real_tokens,
+                               extra=lambda _: {'padding_efficiency': round(runner.padding.efficiency, 4)},
+                               backend=backend, batch_size=batch_size, chunks=len(windows))
+            if scores is None:
+                scores = result
+    return scores
+
+
+def bench_lexicon(bench: Benchmark, texts: List[str]) -> None:
+    from lexicon_scoring import LexiconScorer, encode_corpus
+    from nrc_lexicon import load_lexicon
+
+    scorer = LexiconScorer(load_lexicon())
+    corpus = bench.run('lexicon_encode', lambda: encode_corpus(texts, scorer.lexicon), len(texts),
+                       tokens=lambda c: c.tokens.sum())
+    bench.run('lexicon_score', lambda: scorer.score(corpus), len(texts),
+              tokens=lambda _: corpus.tokens.sum(), sentences=len(corpus.tokens))
+
+
+def bench_word_frequency(bench: Benchmark, df: pd.DataFrame, workers: int) -> str:
+    """Tokenize, build the document-term matrix and take the top words; returns the stopword source."""
+    from doc_term_matrix import DocTermMatrix
+    from text_tokenizer import ARTICLE_STOP_WORDS, Tokenizer, english_stop_words
+
+    try:
+        stop_words, source = english_stop_words(), 'nltk'
+    except LookupError:
+        # Offline without the NLTK data: custom stopwords only
+        stop_words, source = frozenset(), 'custom only'
+    tokenizer = Tokenizer(ARTICLE_STOP_WORDS, stop_words=stop_words)
+    texts = (df['title'].astype(str) + ' ' + df['text'].astype(str)).tolist()
+    docs = pd.DataFrame({'doc_id': df['url'], 'source': 'article', 'author': df['author'],
+                         'date': pd.to_datetime(df['datetime'], format='mixed').dt.normalize(),
+                         'title': df['title']})
+
+    token_lists = bench.run('word_freq_tokenize', lambda: tokenizer.tokenize_many(texts, workers=workers),
+                            len(texts), tokens=lambda lists: sum(map(len, lists)), workers=workers)
+    matrix = bench.run('word_freq_matrix', lambda: DocTermMatrix.build(token_lists, docs), len(texts),
+                       tokens=lambda m: m.counts.sum())
+    bench.run('word_freq_top_n', lambda: matrix.by_group('month', 10), len(texts))
+    return source
+
+
+def bench_plots(bench: Benchmark, df: pd.DataFrame, scores: Any, work_dir: Path) -> None:
+    """Aggregate chunk scores into an article table and render every viz_article_master figure."""
+    import matplotlib.pyplot as plt
+    import viz_article_master as viz
+    from aggregate import aggregate_chunks
+    from sentiment_aggregates import compute_aggregates
+
+    plt.switch_backend('Agg')
+    viz.SHOW_FIGURES = False
+    viz.FIGURE_DIR = str(work_dir / 'figures')
+
+    results = bench.run('aggregation', lambda: aggregate_chunks(scores), len(df),
+                        tokens=lambda _: scores.lengths.sum())
+    scored = df[['datetime', 'author']].assign(pos_score=results['pos_score'].values,
+                                               neg_score=results['neg_score'].values,
+                                               sentiment=results['sentiment'].values)
+    scored['datetime'] = pd.to_datetime(scored['datetime'], format='mixed')
+    scored['sentiment_score'] = scored['pos_score'] - scored['neg_score']
+
+    aggregates = bench.run('plot_aggregates', lambda: compute_aggregates(scored), len(df))
+    for name, plot in viz.FIGURES.items():
+        kwargs = {'aggregates': aggregates} if name in viz.AGGREGATE_FIGURES else {}
+        bench.run(f"plot[{name}]", lambda: plot(scored, **kwargs), len(df))
+
+
+def environment() -> Dict[str, Any]:
+    import os
+    import torch
+    import transformers
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'transformers': transformers.__version__,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print each stage's time against a baseline run; returns the stages slower by > threshold."""
+    before = {r['stage']: r for r in baseline['stages'] if not r['params'].get('skipped')}
+    regressions = []
+    print(f"\nAgainst {baseline['meta']['environment'].get('commit')} "
+          f"({baseline['meta']['environment']['timestamp']}):")
+    for result in current['stages']:
+        old = before.get(result['stage'])
+        if old is None or result['params'].get('skipped') or old['seconds'] <= 0:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(result['stage'])
+        print(f"  {result['stage']:<32}{old['seconds']:8.3f}s -> {result['seconds']:8.3f}s ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time every stage of the sentiment pipeline offline")
+    parser.add_argument("--corpus", choices=["synthetic", "sampled"], default="synthetic",
+                        help="generated Vox-like articles, or a sample of the local articles/transcripts")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--mean-words", type=int, default=900, help="synthetic document length")
+    parser.add_argument("--model", type=str,
+                        help="model name or path (default: a tiny randomly initialised DistilBERT)")
+    parser.add_argument("--backend", action="append", choices=["torch", "int8", "onnx"],
+                        help="inference backend (repeat for several; default: torch)")
+    parser.add_argument("--batch-size", action="append", type=int,
+                        help="inference batch size (repeat for several; default: 8 and 32)")
+    parser.add_argument("--workers", type=int, default=1, help="word-frequency tokenizer processes")
+    parser.add_argument("--threads", type=int, help="torch threads")
+    parser.add_argument("--repeat", type=int, default=1, help="report the best of this many runs per stage")
+    parser.add_argument("--skip", action="append", default=[],
+                        choices=["transformer", "lexicon", "word_freq", "plots"])
+    parser.add_argument("--output", type=str, help="results JSON (default: results/<timestamp>.json)")
+    parser.add_argument("--compare", type=str, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio above which a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    df = synthetic_corpus(args.docs, args.mean_words) if args.corpus == 'synthetic' else sampled_corpus(args.docs)
+    texts = df['text'].astype(str).tolist()
+    print(f"{len(df)} {args.corpus} documents, {sum(len(t.split()) for t in texts):,} words")
+
+    bench = Benchmark(args.repeat)
+    meta: Dict[str, Any] = {'corpus': args.corpus, 'docs': len(df), 'repeat': args.repeat}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        model = args.model or str(build_tiny_model(work_dir / 'tiny-distilbert'))
+        meta['model'] = args.model or 'tiny (dim=32, 2 layers)'
+
+        scores = None
+        if 'transformer' not in args.skip:
+            scores = bench_transformer(bench, texts, model, args.backend or ['torch'],
+                                       args.batch_size or [8, 32], work_dir)
+        if 'lexicon' not in args.skip:
+            bench_lexicon(bench, texts)
+        if 'word_freq' not in args.skip:
+            meta['stop_words'] = bench_word_frequency(bench, df, args.workers)
+        if 'plots' not in args.skip and scores is not None:
+            bench_plots(bench, df, scores, work_dir)
+
+    meta['environment'] = environment()
+    results = {'meta': meta, 'stages': [r.to_dict() for r in bench.results]}
+    output = Path(args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=float))
+    print(f"Results saved to '{output}'")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
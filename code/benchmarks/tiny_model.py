@@ -0,0 +1,61 @@
+import argparse
+import string
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+SPECIAL_TOKENS = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+
+# Whole-word entries on top of the single characters; everything else is
+# spelled out letter by letter, so token counts stay realistic
+COMMON_WORDS = (
+    "the of and to in that is for it on with as was be by this are at from or an have not "
+    "but they he she his her their we you said more about will one would there all has who "
+    "been new people what which when also can year than so its like just some out into up "
+    "vox news trump biden harris election policy court state government president campaign "
+    "good bad great terrible crisis hope fear win lose support attack growth decline"
+).split()
+
+
+def vocabulary(words: Iterable[str] = COMMON_WORDS) -> List[str]:
+    """WordPiece vocab: special tokens, punctuation, letters and digits (plain and ##), words."""
+    chars = list(string.ascii_lowercase + string.digits) + list(".,!?;:'\"-()$%")
+    vocab = SPECIAL_TOKENS + chars + [f"##{c}" for c in string.ascii_lowercase + string.digits]
+    return vocab + [w for w in dict.fromkeys(words) if w not in vocab]
+
+
+def build_tiny_model(output_dir: Path, dim: int = 32, layers: int = 2, heads: int = 2,
+                     seed: int = 0) -> Path:
+    """Save a randomly initialised DistilBERT SST-2 lookalike that loads with from_pretrained.
+
+    Same labels, tokenizer class and 512-token limit as the real model, a
+    fraction of its size, and no network access needed.
+    """
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = DistilBertTokenizerFast(vocab={w: i for i, w in enumerate(vocabulary())},
+                                        do_lower_case=True, model_max_length=512)
+    tokenizer.save_pretrained(output_dir)
+
+    torch.manual_seed(seed)
+    config = DistilBertConfig(vocab_size=len(tokenizer), dim=dim, hidden_dim=2 * dim,
+                              n_layers=layers, n_heads=heads, max_position_embeddings=512,
+                              id2label={0: 'NEGATIVE', 1: 'POSITIVE'},
+                              label2id={'NEGATIVE': 0, 'POSITIVE': 1})
+    DistilBertForSequenceClassification(config).save_pretrained(output_dir)
+    return output_dir
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a tiny offline DistilBERT for benchmarks")
+    parser.add_argument("output_dir", type=str)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--layers", type=int, default=2)
+    args = parser.parse_args(argv)
+    print(f"Tiny model saved to '{build_tiny_model(Path(args.output_dir), args.dim, args.layers)}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from transcript_loader import load_transcripts
+
+from nrc_lexicon import COMPILED_PATH, DATA_DIR, EMOTIONS, VAD_COLUMNS, CompiledLexicon, load_lexicon
+
+OUTPUT_DIR = DATA_DIR / 'lexicon_scores'
+
+# Same notion of a word as preprocess.tokenize_sentence: runs of \w, lowercased
+TOKEN_RE = re.compile(r'\w+')
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+@dataclass
+class EncodedCorpus:
+    """Every sentence of a corpus as lexicon ids in one sparse count matrix.
+
+    counts[s, w] is how often lexicon word w occurs in sentence s;
+    sentence_doc maps sentences to documents and tokens holds each
+    sentence's total token count (lexicon words or not).
+    """
+    counts: sparse.csr_matrix   # (n_sentences, n_lexicon_words)
+    sentence_doc: np.ndarray    # (n_sentences,)
+    tokens: np.ndarray          # (n_sentences,)
+    n_docs: int
+
+
+def encode_corpus(texts: Sequence[str], lexicon: CompiledLexicon) -> EncodedCorpus:
+    """Split documents into sentences and map every token to a lexicon id once."""
+    word_ids = lexicon.word_ids()
+    sentence_doc, token_counts, ids = [], [], []
+    for d, text in enumerate(texts):
+        for sentence in SENTENCE_RE.split(str(text).lower()):
+            tokens = TOKEN_RE.findall(sentence)
+            if not tokens:
+                continue
+            sentence_doc.append(d)
+            token_counts.append(len(tokens))
+            ids.append(np.fromiter(map(word_ids.get, tokens, repeat(-1)), dtype=np.int64,
+                                   count=len(tokens)))
+
+    n_sentences = len(ids)
+    rows = np.repeat(np.arange(n_sentences), [len(a) for a in ids])
+    cols = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+    known = cols >= 0
+    counts = sparse.csr_matrix((np.ones(known.sum(), dtype=np.float32), (rows[known], cols[known])),
+                               shape=(n_sentences, len(lexicon)))
+    counts.sum_duplicates()
+    return EncodedCorpus(counts, np.asarray(sentence_doc, dtype=np.int64),
+                         np.asarray(token_counts, dtype=np.int64), len(texts))
+
+
+class LexiconScorer:
+    """NRC emotion counts and mean valence/arousal/dominance via sparse products.
+
+    Word-level lexicon columns are multiplied against the sentence x word
+    count matrix once; document scores are sums of their sentences.
+    """
+
+    def __init__(self, lexicon: CompiledLexicon):
+        self.lexicon = lexicon
+        self.emotions = sparse.csr_matrix(lexicon.emotion_matrix().astype(np.float32))
+        vad = lexicon.vad.astype(np.float32)
+        self.has_vad = (~np.isnan(vad[:, 0])).astype(np.float32)
+        self.vad = np.nan_to_num(vad)
+
+    def _sums(self, counts: sparse.csr_matrix) -> np.ndarray:
+        """Per-row [lexicon tokens, 10 emotion counts, VAD tokens, 3 VAD sums]."""
+        return np.hstack([
+            np.asarray(counts.sum(axis=1)),
+            (counts @ self.emotions).toarray(),
+            (counts @ self.has_vad)[:, None],
+            counts @ self.vad,
+        ])
+
+    @staticmethod
+    def _frame(sums: np.ndarray, tokens: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame({'tokens': tokens, 'lexicon_tokens': sums[:, 0].astype(np.int64)})
+        for j, emotion in enumerate(EMOTIONS):
+            df[emotion] = sums[:, 1 + j].astype(np.int64)
+        vad_tokens = sums[:, 11]
+        df['vad_tokens'] = vad_tokens.astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for j, column in enumerate(VAD_COLUMNS):
+                df[column] = np.where(vad_tokens > 0, sums[:, 12 + j] / vad_tokens, np.nan)
+        return df
+
+    def score(self, corpus: EncodedCorpus) -> pd.DataFrame:
+        """One row per document."""
+        # document x sentence indicator: one more sparse product sums sentence counts per document
+        n_sentences = len(corpus.sentence_doc)
+        doc_sentences = sparse.csr_matrix(
+            (np.ones(n_sentences, dtype=np.float32), (corpus.sentence_doc, np.arange(n_sentences))),
+            shape=(corpus.n_docs, n_sentences))
+        doc_counts = doc_sentences @ corpus.counts
+        tokens = np.bincount(corpus.sentence_doc, weights=corpus.tokens, minlength=corpus.n_docs)
+        df = self._frame(self._sums(doc_counts), tokens.astype(np.int64))
+        df.insert(1, 'sentences', np.bincount(corpus.sentence_doc, minlength=corpus.n_docs))
+        return df
+
+    def score_sentences(self, corpus: EncodedCorpus) -> pd.DataFrame:
+        """One row per sentence, with doc_index and sentence number in the document."""
+        df = self._frame(self._sums(corpus.counts), corpus.tokens)
+        starts = np.searchsorted(corpus.sentence_doc, corpus.sentence_doc)
+        df.insert(0, 'doc_index', corpus.sentence_doc)
+        df.insert(1, 'sentence', np.arange(len(corpus.sentence_doc)) - starts)
+        return df
+
+
+def read_docx_texts(directory: Path) -> pd.DataFrame:
+    """Full text and episode date of every .docx transcript in directory."""
+    rows = [{'doc_id': t.name, 'date': t.date, 'text': t.text} for t in load_transcripts(str(directory))]
+    return pd.DataFrame(rows, columns=['doc_id', 'date', 'text'])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="NRC emotion and VAD scores for whole corpora")
+    parser.add_argument("--input", type=str, help="CSV with a text column")
+    parser.add_argument("--docx-dir", type=str, default=str(DATA_DIR / 'vox_podcasts' / '2024'),
+                        help="score these .docx transcripts when no --input is given")
+    parser.add_argument("--text-col", type=str, default="text")
+    parser.add_argument("--id-col", type=str, help="column copied next to the scores")
+    parser.add_argument("--output", type=str, help="per-document CSV")
+    parser.add_argument("--sentences", type=str, help="also write per-sentence scores here")
+    parser.add_argument("--lexicon", type=str, default=str(COMPILED_PATH))
+    args = parser.parse_args(argv)
+
+    if args.input:
+        df = pd.read_csv(args.input)
+        stem = Path(args.input).stem
+    else:
+        df = read_docx_texts(Path(args.docx_dir))
+        stem = 'vox_podcasts'
+    id_col = args.id_col or ('doc_id' if 'doc_id' in df.columns else None)
+
+    start = time.perf_counter()
+    scorer = LexiconScorer(load_lexicon(Path(args.lexicon)))
+    corpus = encode_corpus(df[args.text_col].tolist(), scorer.lexicon)
+    encoded = time.perf_counter()
+    scores = scorer.score(corpus)
+    print(f"{corpus.n_docs} documents, {len(corpus.tokens)} sentences, {corpus.tokens.sum()} tokens: "
+          f"encoded in {encoded - start:.2f}s, scored in {time.perf_counter() - encoded:.2f}s")
+
+    if 'date' in df.columns:
+        scores.insert(0, 'date', df['date'].values)
+    if id_col:
+        scores.insert(0, id_col, df[id_col].values)
+    output = Path(args.output or OUTPUT_DIR / f"{stem}_nrc.csv")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    scores.to_csv(output, index=False)
+    print(f"Document scores saved to '{output}'")
+
+    if args.sentences:
+        sentences = scorer.score_sentences(corpus)
+        if id_col:
+            sentences.insert(0, id_col, df[id_col].values[sentences['doc_index']])
+        Path(args.sentences).parent.mkdir(parents=True, exist_ok=True)
+        sentences.to_csv(args.sentences, index=False)
+        print(f"Sentence scores saved to '{args.sentences}'")
+
+
+if __name__ == "__main__":
+    main()
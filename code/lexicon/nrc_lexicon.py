@@ -0,0 +1,228 @@
+import argparse
+import bisect
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+EMOTION_PATH = DATA_DIR / 'NRC-Emotion-Lexicon' / 'NRC-Emotion-Lexicon-Wordlevel-v0.92.txt'
+VAD_PATH = DATA_DIR / 'NRC-VAD-Lexicon' / 'NRC-VAD-Lexicon.txt'
+COMPILED_PATH = DATA_DIR / 'lexicon' / 'nrc_lexicon.bin'
+
+# Same order (and bit positions) as VoxEmotionData.labels
+EMOTIONS = ('anger', 'anticipation', 'disgust', 'fear', 'joy',
+            'negative', 'positive', 'sadness', 'surprise', 'trust')
+VAD_COLUMNS = ('valence', 'arousal', 'dominance')
+
+# Set on every word listed in the emotion lexicon, even with no emotions
+IN_EMOTION_LEXICON = 1 << 15
+
+MAGIC = b'NRCLEX01'
+# magic, word count, emotion count, size of the word blob in bytes
+HEADER = struct.Struct('<8sIIQ')
+
+
+def read_sources(emotion_path: Path = EMOTION_PATH,
+                 vad_path: Path = VAD_PATH) -> Dict[str, list]:
+    """Parse both text lexicons into {word: [emotion bits, (v, a, d) or None]}."""
+    bit = {emotion: 1 << i for i, emotion in enumerate(EMOTIONS)}
+    entries: Dict[str, list] = {}
+
+    with open(emotion_path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) != 3:
+                continue
+            word, emotion, value = parts
+            entry = entries.setdefault(word, [0, None])
+            entry[0] |= IN_EMOTION_LEXICON
+            if value == '1':
+                entry[0] |= bit[emotion]
+
+    with open(vad_path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) != 4 or parts[1] == 'Valence':
+                continue
+            entries.setdefault(parts[0], [0, None])[1] = tuple(float(x) for x in parts[1:])
+
+    return entries
+
+
+def compile_lexicon(output_path: Path = COMPILED_PATH, emotion_path: Path = EMOTION_PATH,
+                    vad_path: Path = VAD_PATH) -> int:
+    """Write the merged lexicons as one binary file; returns the word count.
+
+    Layout after the header: uint32 word offsets (n + 1), uint16 emotion
+    bitsets (n), float16 valence/arousal/dominance (n x 3, NaN when the word
+    isn't in the VAD lexicon) and the utf-8 words concatenated in byte order.
+    """
+    entries = read_sources(emotion_path, vad_path)
+    words = sorted(w.encode('utf-8') for w in entries)
+    n = len(words)
+
+    offsets = np.zeros(n + 1, dtype='<u4')
+    np.cumsum([len(w) for w in words], out=offsets[1:])
+    emotions = np.empty(n, dtype='<u2')
+    vad = np.full((n, 3), np.nan, dtype='<f2')
+    for i, word in enumerate(words):
+        bits, scores = entries[word.decode('utf-8')]
+        emotions[i] = bits
+        if scores is not None:
+            vad[i] = scores
+
+    blob = b''.join(words)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, n, len(EMOTIONS), len(blob)))
+        f.write(offsets.tobytes())
+        f.write(emotions.tobytes())
+        f.write(vad.tobytes())
+        f.write(blob)
+    tmp_path.replace(output_path)
+    return n
+
+
+class _WordTable:
+    """Sorted words as a sequence of bytes, read straight from the mapping."""
+
+    def __init__(self, blob: memoryview, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class CompiledLexicon:
+    """Memory-mapped view of a file written by compile_lexicon.
+
+    Opening only maps the file; single words are found by binary search
+    over the sorted table, and word_ids() builds a hash index on first use
+    for bulk lookups.
+    """
+
+    def __init__(self, path: Path = COMPILED_PATH):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n, n_emotions, blob_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or n_emotions != len(EMOTIONS):
+            raise ValueError(f"{self.path} is not a compiled NRC lexicon; rebuild it")
+
+        pos = HEADER.size
+        self.offsets = np.frombuffer(self._mmap, dtype='<u4', count=n + 1, offset=pos)
+        pos += self.offsets.nbytes
+        self.emotion_bits = np.frombuffer(self._mmap, dtype='<u2', count=n, offset=pos)
+        pos += self.emotion_bits.nbytes
+        self.vad = np.frombuffer(self._mmap, dtype='<f2', count=3 * n, offset=pos).reshape(n, 3)
+        pos += self.vad.nbytes
+        self._words = _WordTable(memoryview(self._mmap)[pos:pos + blob_size], self.offsets)
+        self._ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return self.index(word) >= 0
+
+    def word(self, i: int) -> str:
+        return self._words[i].decode('utf-8')
+
+    def words(self) -> List[str]:
+        return [self.word(i) for i in range(len(self))]
+
+    def index(self, word: str) -> int:
+        """Position of word in the table, or -1 (O(log n) binary search)."""
+        key = word.encode('utf-8')
+        i = bisect.bisect_left(self._words, key)
+        return i if i < len(self) and self._words[i] == key else -1
+
+    def word_ids(self) -> Dict[str, int]:
+        """Hash index of the whole table, built once."""
+        if self._ids is None:
+            self._ids = {word: i for i, word in enumerate(self.words())}
+        return self._ids
+
+    def lookup_many(self, words: Iterable[str]) -> np.ndarray:
+        """Table positions of many words at once (-1 where missing)."""
+        ids = self.word_ids()
+        return np.fromiter((ids.get(w, -1) for w in words), dtype=np.int64)
+
+    def emotions(self, word: str) -> List[str]:
+        """Emotions the lexicon associates with word."""
+        i = self.index(word)
+        if i < 0:
+            return []
+        bits = int(self.emotion_bits[i])
+        return [e for j, e in enumerate(EMOTIONS) if bits & (1 << j)]
+
+    def vad_scores(self, word: str) -> Optional[np.ndarray]:
+        """(valence, arousal, dominance) of word, or None if it has no VAD entry."""
+        i = self.index(word)
+        if i < 0 or np.isnan(self.vad[i, 0]):
+            return None
+        return self.vad[i].astype(np.float32)
+
+    def emotion_matrix(self) -> np.ndarray:
+        """(n_words, 10) 0/1 matrix unpacked from the bitsets."""
+        shifts = np.arange(len(EMOTIONS), dtype=np.uint16)
+        return ((self.emotion_bits[:, None] >> shifts) & 1).astype(np.uint8)
+
+    def in_emotion_lexicon(self) -> np.ndarray:
+        return (self.emotion_bits & IN_EMOTION_LEXICON) != 0
+
+    def close(self) -> None:
+        self._words = None
+        self.offsets = self.emotion_bits = self.vad = None
+        self._mmap.close()
+
+
+def is_stale(path: Path = COMPILED_PATH, sources: Sequence[Path] = (EMOTION_PATH, VAD_PATH)) -> bool:
+    """True if the compiled file is missing or older than a source lexicon."""
+    path = Path(path)
+    if not path.exists():
+        return True
+    built = path.stat().st_mtime
+    return any(Path(s).stat().st_mtime > built for s in sources)
+
+
+def load_lexicon(path: Path = COMPILED_PATH) -> CompiledLexicon:
+    """Open the compiled lexicon, compiling it first if needed."""
+    if is_stale(path):
+        n = compile_lexicon(path)
+        print(f"Compiled {n} lexicon words into '{path}'")
+    return CompiledLexicon(path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile the NRC Emotion and VAD lexicons to a binary index")
+    parser.add_argument("--emotion", type=str, default=str(EMOTION_PATH))
+    parser.add_argument("--vad", type=str, default=str(VAD_PATH))
+    parser.add_argument("--output", type=str, default=str(COMPILED_PATH))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    n = compile_lexicon(Path(args.output), Path(args.emotion), Path(args.vad))
+    print(f"Compiled {n} words in {time.perf_counter() - start:.2f}s "
+          f"({Path(args.output).stat().st_size / 1e6:.2f} MB)")
+
+    start = time.perf_counter()
+    lexicon = CompiledLexicon(Path(args.output))
+    lexicon.index('abandon')
+    print(f"Opened and queried in {(time.perf_counter() - start) * 1000:.2f} ms")
+    lexicon.close()
+
+
+if __name__ == "__main__":
+    main()
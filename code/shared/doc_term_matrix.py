@@ -0,0 +1,211 @@
+import argparse
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from text_tokenizer import ARTICLE_STOP_WORDS, Tokenizer
+from transcript_loader import TRANSCRIPT_DIR, load_transcripts
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+ARTICLES_CSV = DATA_DIR / 'vox_articles' / '2024_all_vox_articles.csv'
+STORE_PATH = DATA_DIR / 'word_freq' / 'doc_term_matrix.npz'
+
+META_COLUMNS = ['doc_id', 'source', 'date', 'author', 'title']
+
+
+@dataclass
+class DocTermMatrix:
+    """Word counts of every article and transcript, tokenized once.
+
+    counts is a (documents x vocab) CSR matrix, vocab the word of every
+    column and docs one metadata row (doc_id, source, date, author, title)
+    per matrix row. Frequencies for any subset of documents are column sums
+    over a row mask, so no query touches raw text.
+    """
+    counts: sparse.csr_matrix
+    vocab: np.ndarray
+    docs: pd.DataFrame
+
+    @classmethod
+    def build(cls, token_lists: Sequence[List[str]], docs: pd.DataFrame) -> 'DocTermMatrix':
+        word_ids: Dict[str, int] = {}
+        lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=len(token_lists))
+        indices = np.fromiter((word_ids.setdefault(w, len(word_ids)) for tokens in token_lists for w in tokens),
+                              dtype=np.int32, count=int(lengths.sum()))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        counts = sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                   shape=(len(token_lists), len(word_ids)))
+        counts.sum_duplicates()
+        return cls(counts, np.array(list(word_ids), dtype=object), docs.reset_index(drop=True))
+
+    def save(self, path: Path = STORE_PATH, signature: str = '') -> None:
+        """Write the matrix and metadata; signature records the inputs it was built from."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {f'meta_{c}': np.array(self.docs[c].fillna('').astype(str).tolist(), dtype=str)
+                for c in META_COLUMNS if c != 'date'}
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, data=self.counts.data, indices=self.counts.indices,
+                                indptr=self.counts.indptr, shape=np.array(self.counts.shape),
+                                vocab=self.vocab.astype(str),
+                                meta_date=self.docs['date'].to_numpy(dtype='datetime64[D]'),
+                                signature=np.array(signature), **meta)
+
+    @classmethod
+    def load(cls, path: Path = STORE_PATH) -> 'DocTermMatrix':
+        with np.load(path) as f:
+            counts = sparse.csr_matrix((f['data'], f['indices'], f['indptr']), shape=tuple(f['shape']))
+            docs = pd.DataFrame({c: f[f'meta_{c}'] for c in META_COLUMNS})
+            vocab = f['vocab'].astype(object)
+        docs['date'] = pd.to_datetime(docs['date'])
+        docs['author'] = docs['author'].replace('', None)
+        return cls(counts, vocab, docs)
+
+    def mask(self, start: Optional[str] = None, end: Optional[str] = None,
+             source: Optional[str] = None, author: Optional[str] = None) -> np.ndarray:
+        """Boolean row selection by date range (inclusive), source and author."""
+        keep = np.ones(len(self.docs), dtype=bool)
+        dates = self.docs['date']
+        if start is not None:
+            keep &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            keep &= (dates <= pd.Timestamp(end)).to_numpy()
+        if source is not None:
+            keep &= (self.docs['source'] == source).to_numpy()
+        if author is not None:
+            keep &= (self.docs['author'] == author).to_numpy()
+        return keep
+
+    def totals(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Count of every vocab word over the selected documents."""
+        rows = self.counts if mask is None else self.counts[mask]
+        return np.asarray(rows.sum(axis=0)).ravel()
+
+    def frequencies(self, mask: Optional[np.ndarray] = None, n: Optional[int] = None) -> Counter:
+        """Word counts over the selected documents (the n most common if given)."""
+        totals = self.totals(mask)
+        nonzero = np.flatnonzero(totals)
+        if n is not None and n < len(nonzero):
+            nonzero = nonzero[np.argpartition(-totals[nonzero], n - 1)[:n]]
+        return Counter(dict(zip(self.vocab[nonzero].tolist(), totals[nonzero].tolist())))
+
+    def top_n(self, n: int = 20, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        return pd.DataFrame(self.frequencies(mask, n).most_common(n), columns=['Word', 'Count'])
+
+    def by_group(self, key: str, n: int = 10, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Top n words per month, author or source, as (group, Word, Count) rows.
+
+        Documents are summed per group with one sparse indicator product.
+        """
+        docs = self.docs if mask is None else self.docs[mask]
+        counts = self.counts if mask is None else self.counts[mask]
+        if key == 'month':
+            groups = docs['date'].dt.to_period('M').astype(str).to_numpy()
+        else:
+            groups = docs[key].astype(str).to_numpy()
+        valid = ~pd.isna(docs['date'] if key == 'month' else docs[key]).to_numpy()
+        labels, group_index = np.unique(groups[valid], return_inverse=True)
+        indicator = sparse.csr_matrix((np.ones(valid.sum(), dtype=np.int32),
+                                       (group_index, np.flatnonzero(valid))),
+                                      shape=(len(labels), counts.shape[0]))
+        group_counts = (indicator @ counts).toarray()
+
+        rows = []
+        for label, totals in zip(labels, group_counts):
+            top = np.argsort(-totals, kind='stable')[:n]
+            top = top[totals[top] > 0]
+            rows.extend((label, w, int(c)) for w, c in zip(self.vocab[top], totals[top]))
+        return pd.DataFrame(rows, columns=[key, 'Word', 'Count'])
+
+
+def source_signature(articles_csv: Path = ARTICLES_CSV, transcript_dir: Path = TRANSCRIPT_DIR) -> str:
+    """The resolved inputs and the name, size and mtime of every file in them, as JSON.
+
+    Any added, removed, replaced or touched file, or a different CSV or
+    transcript directory, gives a different signature.
+    """
+    articles_csv, transcript_dir = Path(articles_csv).resolve(), Path(transcript_dir).resolve()
+    paths = [p for p in [articles_csv] if p.exists()] + sorted(transcript_dir.glob('*.docx'))
+    files = [[str(p), p.stat().st_size, p.stat().st_mtime_ns] for p in paths]
+    return json.dumps({'articles_csv': str(articles_csv), 'transcript_dir': str(transcript_dir),
+                       'files': files})
+
+
+def stored_signature(path: Path) -> Optional[str]:
+    """Signature saved with the matrix at path, if any."""
+    try:
+        with np.load(path) as f:
+            return str(f['signature']) if 'signature' in f.files else None
+    except (OSError, ValueError):
+        return None
+
+
+def build_store(articles_csv: Path = ARTICLES_CSV, transcript_dir: Path = TRANSCRIPT_DIR,
+                workers: int = 1) -> DocTermMatrix:
+    """Tokenize the article CSV (title + text) and the podcast transcripts once."""
+    token_lists: List[List[str]] = []
+    frames = []
+
+    if Path(articles_csv).exists():
+        articles = pd.read_csv(articles_csv)
+        texts = articles['title'].astype(str) + ' ' + articles['text'].astype(str)
+        token_lists += Tokenizer(ARTICLE_STOP_WORDS).tokenize_many(texts, workers=workers)
+        frames.append(pd.DataFrame({
+            'doc_id': articles['url'].astype(str),
+            'source': 'article',
+            'date': pd.to_datetime(articles['datetime'], format='mixed', errors='coerce').dt.normalize(),
+            'author': articles['author'] if 'author' in articles.columns else None,
+            'title': articles['title'].astype(str),
+        }))
+    else:
+        print(f"No article CSV at '{articles_csv}'; building from transcripts only")
+
+    if Path(transcript_dir).exists():
+        transcripts = load_transcripts(str(transcript_dir))
+        token_lists += Tokenizer(strip_urls=False).tokenize_many([t.text for t in transcripts], workers=workers)
+        frames.append(pd.DataFrame({
+            'doc_id': [t.name for t in transcripts],
+            'source': 'podcast',
+            'date': pd.to_datetime([t.date for t in transcripts]),
+            'author': None,
+            'title': [t.title for t in transcripts],
+        }))
+
+    docs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=META_COLUMNS)
+    return DocTermMatrix.build(token_lists, docs[META_COLUMNS])
+
+
+def load_store(path: Path = STORE_PATH, rebuild: bool = False, **build_kwargs) -> DocTermMatrix:
+    """The saved matrix, rebuilt first if missing or built from other inputs than these."""
+    path = Path(path)
+    signature = source_signature(build_kwargs.get('articles_csv', ARTICLES_CSV),
+                                 build_kwargs.get('transcript_dir', TRANSCRIPT_DIR))
+    if rebuild or not path.exists() or stored_signature(path) != signature:
+        start = time.perf_counter()
+        matrix = build_store(**build_kwargs)
+        matrix.save(path, signature)
+        print(f"Built document-term matrix {matrix.counts.shape} in {time.perf_counter() - start:.1f}s: '{path}'")
+        return matrix
+    return DocTermMatrix.load(path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the word-frequency document-term matrix")
+    parser.add_argument("--output", type=str, default=str(STORE_PATH))
+    parser.add_argument("--workers", type=int, default=1, help="tokenizer worker processes")
+    args = parser.parse_args(argv)
+
+    matrix = load_store(Path(args.output), rebuild=True, workers=args.workers)
+    print(matrix.docs['source'].value_counts().to_string())
+    print(matrix.top_n(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+class RunMetrics:
+    """Stage timers and counters for one run, written as JSON lines.
+
+    Every stage appends one record when it finishes: its name, wall and CPU
+    seconds, start/end timestamps and whatever counts the caller filled in
+    (documents, chunks, tokens, padding, cache hits...). close() appends a
+    summary with per-stage totals and the run-wide counters. Without a path
+    nothing is written, so call sites can stay instrumented unconditionally.
+
+    With profile_stage set, that stage (every time it runs) is also recorded
+    under cProfile and dumped to profile_path for pstats or snakeviz. Records
+    carry the pid and epoch timestamps, so a py-spy recording of the same
+    process (py-spy record --pid) can be cut down to one stage.
+    """
+
+    def __init__(self, path: Optional[str] = None, run: Optional[str] = None,
+                 profile_stage: Optional[str] = None, profile_path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.run = run or uuid.uuid4().hex[:12]
+        self.counters: Dict[str, float] = {}
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.profile_stage = profile_stage
+        self.profile_path = None
+        if profile_stage:
+            self.profile_path = Path(profile_path or f"{path or 'run'}.{profile_stage}.prof")
+        self._profiler = None
+        self._file = None
+        self._start = time.time()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """Append one record; a no-op without a metrics path."""
+        if self.path is None:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        record = {'ts': round(time.time(), 3), 'run': self.run, 'pid': os.getpid(), 'event': event, **fields}
+        self._file.write(json.dumps(record, default=_jsonable) + '\n')
+        self._file.flush()
+
+    def count(self, name: str, n: float = 1) -> None:
+        """Add n to a run-wide counter."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name: str, seconds: float, **fields: Any) -> None:
+        """Log a stage timed elsewhere, e.g. in a worker process."""
+        total = self.totals.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        total['calls'] += 1
+        total['seconds'] += seconds
+        self.emit('stage', stage=name, seconds=round(seconds, 6), **fields)
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block; counts put in the yielded dict go into its record."""
+        profiling = name == self.profile_stage
+        if profiling:
+            import cProfile
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiler.enable()
+        start, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - wall
+            cpu_seconds = time.process_time() - cpu
+            if profiling:
+                self._profiler.disable()
+            self.record(name, seconds, cpu_seconds=round(cpu_seconds, 6),
+                        start=round(start, 3), end=round(time.time(), 3), **fields)
+
+    def close(self, **fields: Any) -> None:
+        """Write the run summary (and the profile, if any) and close the log."""
+        if self._profiler is not None:
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(str(self.profile_path))
+            print(f"Profile of stage '{self.profile_stage}' saved to '{self.profile_path}'")
+            self._profiler = None
+        stages = {name: {'calls': total['calls'], 'seconds': round(total['seconds'], 6)}
+                  for name, total in self.totals.items()}
+        self.emit('summary', seconds=round(time.time() - self._start, 3), stages=stages,
+                  counters=self.counters, **fields)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _jsonable(value: Any) -> Any:
+    """numpy scalars and paths in records."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+# Shared no-op instance for code paths run without a metrics log
+NULL_METRICS = RunMetrics()
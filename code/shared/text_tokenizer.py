@@ -0,0 +1,110 @@
+import argparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import filterfalse
+from typing import FrozenSet, Iterable, List, Optional, Sequence
+
+# Custom stop words the article word-frequency figures have always used
+ARTICLE_STOP_WORDS = frozenset({'com', 'vox', 'www', 'https', 'article', 'news'})
+
+# One pass over lowercased text: URLs match the first branch and are dropped,
+# words of two or more \w characters are captured by the second
+TOKEN_RE = re.compile(r'http\S+|www.\S+|(\w\w+)')
+# Words only, URLs split into their parts like any other text
+WORD_RE = re.compile(r'(\w\w+)')
+
+
+def setup_nltk():
+    """Download the NLTK stopword list if not already present."""
+    import nltk
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+
+
+@lru_cache(maxsize=None)
+def english_stop_words() -> FrozenSet[str]:
+    """NLTK's English stopwords, loaded once per process."""
+    from nltk.corpus import stopwords
+    setup_nltk()
+    return frozenset(stopwords.words('english'))
+
+
+class Tokenizer:
+    """Lowercase, split into words and drop stopwords and 1-letter words.
+
+    URLs are dropped first unless strip_urls is False (the podcast figures
+    never stripped them). The stopword set is built once per Tokenizer and
+    the regex is compiled once per process; calling it on a document is one
+    regex scan plus a C-level filter, with no per-token Python code.
+    """
+
+    def __init__(self, extra_stop_words: Iterable[str] = (), stop_words: Optional[FrozenSet[str]] = None,
+                 strip_urls: bool = True):
+        base = english_stop_words() if stop_words is None else stop_words
+        self.stop_words = frozenset(base) | frozenset(extra_stop_words)
+        self.pattern = TOKEN_RE if strip_urls else WORD_RE
+
+    def __call__(self, text) -> List[str]:
+        words = filter(None, self.pattern.findall(str(text).lower()))
+        return list(filterfalse(self.stop_words.__contains__, words))
+
+    def tokenize_many(self, texts: Sequence, workers: int = 1, chunksize: int = 256) -> List[List[str]]:
+        """Tokenize many documents, across worker processes when workers > 1."""
+        texts = list(texts)
+        if workers <= 1 or len(texts) <= chunksize:
+            return [self(t) for t in texts]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self, texts, chunksize=chunksize))
+
+
+def _legacy_tokenize(text, stop_extra=ARTICLE_STOP_WORDS):
+    """The original per-call implementation, kept only for the benchmark."""
+    from nltk.corpus import stopwords
+    stop_words = set(stopwords.words('english'))
+    stop_words.update(stop_extra)
+    text = re.sub(r'http\S+|www.\S+', '', str(text))
+    text = re.sub(r'\W+', ' ', text)
+    tokens = text.lower().split()
+    return [word for word in tokens if word not in stop_words and len(word) > 1]
+
+
+def benchmark(texts: Sequence[str], workers: int = 1) -> None:
+    """Print tokens/sec of the original and the precompiled tokenizer."""
+    tokenizer = Tokenizer(ARTICLE_STOP_WORDS)
+
+    start = time.perf_counter()
+    legacy = [_legacy_tokenize(t) for t in texts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = tokenizer.tokenize_many(texts, workers=workers)
+    fast_time = time.perf_counter() - start
+
+    n_tokens = sum(map(len, fast))
+    same = sum(a == b for a, b in zip(legacy, fast))
+    print(f"{len(texts)} documents, {n_tokens} tokens kept")
+    print(f"original:    {legacy_time:.2f}s ({n_tokens / legacy_time:,.0f} tokens/s)")
+    print(f"precompiled: {fast_time:.2f}s ({n_tokens / fast_time:,.0f} tokens/s, "
+          f"{workers} worker{'s' if workers > 1 else ''}) -> {legacy_time / fast_time:.1f}x")
+    print(f"identical output for {same} of {len(texts)} documents")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Benchmark the word-frequency tokenizer")
+    parser.add_argument("--csv", type=str, default="../../data/vox_articles/2024_all_vox_articles.csv")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.csv)
+    texts = (df['title'].astype(str) + ' ' + df['text'].astype(str)).tolist() if 'title' in df.columns \
+        else df['text'].astype(str).tolist()
+    benchmark(texts, args.workers)
+
+
+if __name__ == "__main__":
+    main()
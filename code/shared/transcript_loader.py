@@ -0,0 +1,156 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from run_metrics import NULL_METRICS, RunMetrics
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+TRANSCRIPT_DIR = DATA_DIR / 'vox_podcasts' / '2024'
+CACHE_PATH = DATA_DIR / 'vox_podcasts' / 'transcript_cache.json'
+
+# "5_29_24_ Chasing the storm.docx" -> May 29 2024, "Chasing the storm"
+FILENAME_RE = re.compile(r'^(\d{1,2})_(\d{1,2})_(\d{2})[\s_]*(.*?)\s*$')
+
+
+@dataclass
+class Transcript:
+    """Paragraphs of one podcast transcript plus what its filename tells us."""
+    path: Path
+    date: Optional[date]
+    title: str
+    paragraphs: List[str]
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def text(self) -> str:
+        """Whole transcript as one string, paragraphs joined by spaces."""
+        return " ".join(self.paragraphs)
+
+
+def parse_filename(name: str) -> Tuple[Optional[date], str]:
+    """Episode date and title from a transcript filename (date is None if absent)."""
+    stem = Path(name).stem
+    match = FILENAME_RE.match(stem)
+    if not match:
+        return None, stem.strip()
+    month, day, year, title = match.groups()
+    try:
+        return date(2000 + int(year), int(month), int(day)), title
+    except ValueError:
+        return None, title
+
+
+def extract_paragraphs(path: str) -> List[str]:
+    """Text of every paragraph in a .docx file, in order."""
+    from docx import Document
+    return [paragraph.text for paragraph in Document(path).paragraphs]
+
+
+def _extract(path: str) -> Tuple[str, Optional[List[str]], Optional[str]]:
+    """Worker wrapper: (path, paragraphs, error message)."""
+    try:
+        return path, extract_paragraphs(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _signature(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class TranscriptCache:
+    """Extracted paragraphs keyed by file path, valid while mtime and size match."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, path: Path) -> Optional[List[str]]:
+        entry = self.entries.get(str(path.resolve()))
+        if entry is not None and entry['signature'] == _signature(path):
+            return entry['paragraphs']
+        return None
+
+    def put(self, path: Path, paragraphs: List[str]) -> None:
+        self.entries[str(path.resolve())] = {'signature': _signature(path), 'paragraphs': paragraphs}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+        self.dirty = False
+
+
+def load_transcripts(directory: str = str(TRANSCRIPT_DIR), workers: Optional[int] = None,
+                     cache_path: Optional[str] = str(CACHE_PATH),
+                     metrics: RunMetrics = NULL_METRICS) -> List[Transcript]:
+    """Every .docx transcript in directory, sorted by filename.
+
+    Files already in the cache with the same mtime and size are not
+    reopened; the rest are parsed across a process pool (workers=1 parses
+    in this process). Files python-docx can't read are reported and skipped.
+    """
+    directory_path = Path(directory)
+    if not directory_path.exists():
+        raise FileNotFoundError(f"Directory not found: {directory}")
+
+    files = sorted(directory_path.glob("*.docx"))
+    with metrics.stage('transcript_cache', files=len(files)) as record:
+        cache = TranscriptCache(Path(cache_path)) if cache_path else None
+
+        paragraphs: Dict[str, List[str]] = {}
+        todo = []
+        for filepath in files:
+            cached = cache.get(filepath) if cache else None
+            if cached is None:
+                todo.append(str(filepath))
+            else:
+                paragraphs[str(filepath)] = cached
+        record['cache_hits'] = len(files) - len(todo)
+
+    workers = workers or os.cpu_count() or 1
+    with metrics.stage('parse_docx', files=len(todo), workers=min(workers, max(len(todo), 1))) as record:
+        if len(todo) > 1 and workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                results = list(pool.map(_extract, todo, chunksize=max(1, len(todo) // (4 * workers))))
+        else:
+            results = [_extract(p) for p in todo]
+
+        for path, extracted, error in results:
+            if error is not None:
+                print(f"Error processing {Path(path).name}: {error}")
+                continue
+            paragraphs[path] = extracted
+            if cache:
+                cache.put(Path(path), extracted)
+        if cache:
+            cache.save()
+        record['errors'] = sum(error is not None for _, _, error in results)
+
+    transcripts = []
+    for filepath in files:
+        if str(filepath) in paragraphs:
+            episode_date, title = parse_filename(filepath.name)
+            transcripts.append(Transcript(filepath, episode_date, title, paragraphs[str(filepath)]))
+    return transcripts
@@ -0,0 +1,97 @@
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+# pandas is imported on use so the CLI can read AGGREGATIONS cheaply
+if TYPE_CHECKING:
+    import pandas as pd
+    from sentiment_engine import ChunkScores
+
+# Columns each of the original scripts wrote, by aggregation name
+AGGREGATIONS: Dict[str, List[str]] = {
+    # bert_article_abs_value.py / bert_analysis_podcasts.py
+    'max_extremity': ['sentiment', 'score'],
+    # bert_article_normalized.py
+    'mean': ['mean_sentiment', 'mean_score', 'intensity', 'chunks_analyzed'],
+    # length-weighted version of 'mean'
+    'weighted_mean': ['weighted_score', 'weighted_pos_score', 'chunks_analyzed', 'tokens_analyzed'],
+    # bert_analysis_raw_probs.py
+    'raw_probs': ['pos_score', 'neg_score', 'margin', 'sentiment'],
+}
+
+
+def _group_argmax(values: np.ndarray, doc_index: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Index of the first largest value within each document's chunks."""
+    # Stable sort by document, then by descending value
+    order = np.lexsort((-values, doc_index))
+    return order[starts]
+
+
+def aggregate_chunks(scores: 'ChunkScores') -> 'pd.DataFrame':
+    """Compute every document-level aggregate from one set of chunk scores.
+
+    All statistics are computed with vectorized reductions over the flat
+    chunk arrays, so adding a summary never needs another forward pass.
+    Returns one row per document with the columns listed in AGGREGATIONS.
+    """
+    import pandas as pd
+
+    probs = scores.probs.astype(np.float64)
+    doc_index = scores.doc_index
+    lengths = scores.lengths.astype(np.float64)
+    labels = np.asarray(scores.labels)
+
+    # Every document has at least one chunk, so these are its first rows
+    starts = np.searchsorted(doc_index, np.arange(scores.n_docs))
+    n_chunks = np.bincount(doc_index, minlength=scores.n_docs)
+    n_tokens = np.bincount(doc_index, weights=lengths, minlength=scores.n_docs)
+
+    # Confidence and label of the predicted class for every chunk
+    top = probs.max(axis=1)
+    pred = probs.argmax(axis=1)
+
+    out = pd.DataFrame(index=pd.RangeIndex(scores.n_docs))
+
+    # Chunk furthest from neutral (max |p - 0.5|)
+    extreme = _group_argmax(np.abs(top - 0.5), doc_index, starts)
+    out['sentiment'] = labels[pred[extreme]]
+    out['score'] = top[extreme]
+
+    # Mean confidence across chunks, mapped to a -1..1 intensity
+    mean_score = np.add.reduceat(top, starts) / n_chunks
+    out['mean_sentiment'] = np.where(mean_score > 0.5, 'positive', 'negative')
+    out['mean_score'] = mean_score
+    out['intensity'] = (mean_score - 0.5) * 2
+
+    # Same mean, weighted by the number of tokens in each chunk
+    out['weighted_score'] = np.add.reduceat(top * lengths, starts) / n_tokens
+
+    if 'POSITIVE' in scores.labels and 'NEGATIVE' in scores.labels:
+        pos = probs[:, scores.labels.index('POSITIVE')]
+        neg = probs[:, scores.labels.index('NEGATIVE')]
+        out['weighted_pos_score'] = np.add.reduceat(pos * lengths, starts) / n_tokens
+
+        # Probabilities of the chunk with the largest |pos - neg|
+        widest = _group_argmax(np.abs(pos - neg), doc_index, starts)
+        out['pos_score'] = pos[widest]
+        out['neg_score'] = neg[widest]
+        out['margin'] = pos[widest] - neg[widest]
+        out['mean_margin'] = np.add.reduceat(pos - neg, starts) / n_chunks
+
+    out['chunks_analyzed'] = n_chunks
+    out['tokens_analyzed'] = n_tokens.astype(np.int64)
+    return out
+
+
+def aggregation_columns(names: Sequence[str]) -> List[str]:
+    """Columns of the named aggregations, in order and without repeats."""
+    unknown = [n for n in names if n not in AGGREGATIONS]
+    if unknown:
+        raise ValueError(f"Unknown aggregation(s) {unknown}; choose from {sorted(AGGREGATIONS)}")
+    return list(dict.fromkeys(c for n in names for c in AGGREGATIONS[n]))
+
+
+def select_aggregations(results: 'pd.DataFrame', names: Sequence[str]) -> 'pd.DataFrame':
+    """Keep the columns of the named aggregations."""
+    columns = aggregation_columns(names)
+    return results[[c for c in columns if c in results.columns]]
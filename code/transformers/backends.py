@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+
+BACKENDS = ('torch', 'int8', 'onnx')
+
+
+def default_onnx_path(model_name: str, revision: str) -> Path:
+    """Where the exported ONNX copy of one revision of a model is kept between runs."""
+    safe_name = model_name.strip('/').replace('/', '_')
+    return Path.home() / '.cache' / 'vox_sentiment' / f'{safe_name}@{revision}.onnx'
+
+
+def revision_path(onnx_path: Path) -> Path:
+    """Sidecar naming the model revision an ONNX file was exported from."""
+    return onnx_path.with_name(onnx_path.name + '.revision')
+
+
+class TorchBackend:
+    """Plain PyTorch forward pass (fp32, or int8 after quantize_dynamic)."""
+
+    def __init__(self, model: 'torch.nn.Module', device: 'torch.device'):
+        self.model = model
+        self.device = device
+
+    def __call__(self, encoded) -> np.ndarray:
+        import torch
+        encoded = encoded.to(self.device)
+        with torch.inference_mode():
+            logits = self.model(**encoded).logits
+        return logits.float().cpu().numpy()
+
+
+class OnnxBackend:
+    """ONNX Runtime session over a model exported once to onnx_path.
+
+    The export is redone whenever the model revision differs from the one
+    recorded next to onnx_path, so updated weights never run stale.
+    """
+
+    def __init__(self, model: 'torch.nn.Module', tokenizer, onnx_path: Path, revision: str,
+                 threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime") from e
+
+        recorded = revision_path(onnx_path)
+        if not onnx_path.exists() or not recorded.exists() or recorded.read_text().strip() != revision:
+            export_onnx(model, tokenizer, onnx_path)
+            recorded.write_text(revision + '\n')
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(onnx_path), options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, encoded) -> np.ndarray:
+        feed = {name: encoded[name].cpu().numpy().astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
+
+
+def export_onnx(model: 'torch.nn.Module', tokenizer, onnx_path: Path) -> None:
+    """Export a sequence classifier with dynamic batch and sequence axes."""
+    import torch
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    sample = tokenizer(["This is a test", "Another test"], padding=True, return_tensors='pt')
+    model = model.to('cpu').eval()
+    torch.onnx.export(
+        model,
+        (sample['input_ids'], sample['attention_mask']),
+        str(onnx_path),
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'},
+                      'attention_mask': {0: 'batch', 1: 'sequence'},
+                      'logits': {0: 'batch'}},
+        opset_version=17,
+        dynamo=False,
+    )
+    print(f"Exported ONNX model: {onnx_path}")
+
+
+def load_backend(name: str, model: 'torch.nn.Module', tokenizer, device: 'torch.device',
+                 onnx_path: Optional[str] = None, revision: str = 'unknown'):
+    """Build the inference callable for one of BACKENDS.
+
+    int8 and onnx are CPU-only; both return raw logits like the torch one.
+    revision identifies the model weights the ONNX export must match.
+    """
+    import torch
+    if name == 'torch':
+        return TorchBackend(model.to(device), device)
+    if name == 'int8':
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model.to('cpu'), {torch.nn.Linear}, dtype=torch.qint8)
+        return TorchBackend(quantized, torch.device('cpu'))
+    if name == 'onnx':
+        path = Path(onnx_path) if onnx_path else default_onnx_path(model.name_or_path, revision)
+        return OnnxBackend(model, tokenizer, path, revision, threads=torch.get_num_threads())
+    raise ValueError(f"Unknown backend '{name}'; choose from {BACKENDS}")
+
+
+def agreement_report(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """How far a backend's probabilities drift from the fp32 reference."""
+    delta = np.abs(reference - candidate)
+    flips = reference.argmax(axis=1) != candidate.argmax(axis=1)
+    return {
+        'n': int(len(reference)),
+        'label_flip_rate': float(flips.mean()) if len(flips) else 0.0,
+        'max_prob_delta': float(delta.max()) if delta.size else 0.0,
+        'mean_prob_delta': float(delta.mean()) if delta.size else 0.0,
+    }
@@ -1,17 +1,10 @@
-
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from tqdm import tqdm
 import time
 from datetime import timedelta
-import torch
-
-def chunk_and_analyze(text, analyzer, chunk_size=400):
-    words = text.split()
-    chunks = [' '.join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size - 50)]
-    sentiments = [analyzer(chunk)[0] for chunk in chunks]
-    overall_sentiment = max(sentiments, key=lambda x: abs(x['score'] - 0.5))
-    return overall_sentiment
+from sentiment_engine import SentimentEngine
+from chunk_cache import ChunkCache
+from aggregate import aggregate_chunks
+from checkpoint import Checkpoint, document_ids, score_with_checkpoint
 
 # Start timer
 start_time = time.time()
@@ -22,34 +15,24 @@ print("Starting sentiment analysis...")
 df = pd.read_csv('../../data/vox_podcasts/podcasts_transcripts_clean.csv')
 print(f"Total articles to process: {len(df)}")
 
-# Setup model with MPS
-model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSequenceClassification.from_pretrained(model_name)
-
-# Move model to MPS device
-device = torch.device("mps")
-model = model.to(device)
+# Setup model (MPS, CUDA or CPU, whichever is available); chunk results are
+# cached so re-running with a different aggregation skips inference
+cache = ChunkCache('../../data/bert_labels/chunk_cache.sqlite', max_entries=1_000_000)
+engine = SentimentEngine(cache=cache)
 
-sentiment_analyzer = pipeline(
-    "sentiment-analysis",
-    model=model,
-    # return_all_scores=True,
-    tokenizer=tokenizer,
-    truncation=True,
-    max_length=512,
-    device=device
-)
+# Score in groups, checkpointing finished podcasts so an interrupted run
+# picks up where it left off
+checkpoint = Checkpoint('../../data/bert_labels/vox_podcast_with_sentiment.checkpoint.jsonl')
+scores = score_with_checkpoint(engine, df['text'].tolist(), document_ids(df, 'doc_id'), checkpoint)
+results = aggregate_chunks(scores)
 
-# Process all articles with visible progress bar
-results = []
-for index, row in tqdm(df.iterrows(), total=len(df), desc="Analyzing articles"):
-    sentiment = chunk_and_analyze(row['text'], sentiment_analyzer)
-    results.append(sentiment)
+# Keep the label and score of the chunk furthest from neutral
+df['sentiment'] = results['sentiment'].values
+df['score'] = results['score'].values
 
-# Convert results to DataFrame columns
-df['sentiment'] = [r['label'] for r in results]
-df['score'] = [r['score'] for r in results]
+print(cache.report())
+print(engine.padding.report())
+cache.close()
 
 # Calculate and display elapsed time
 elapsed_time = time.time() - start_time
@@ -58,6 +41,7 @@ print(f"\nProcessing completed in: {str(timedelta(seconds=int(elapsed_time)))}")
 # Save to CSV
 print("Saving results to CSV...")
 df.to_csv('../../data/bert_labels/vox_podcast_with_sentiment.csv', index=False)
+checkpoint.remove()
 print("Done! Results saved to 'vox_podcast_with_sentiment.csv'")
 
 # Display final time
@@ -1,16 +1,9 @@
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from tqdm import tqdm
 import time
 from datetime import timedelta
-import torch
-
-def chunk_and_analyze(text, analyzer, chunk_size=400):
-    words = text.split()
-    chunks = [' '.join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size - 50)]
-    sentiments = [analyzer(chunk)[0] for chunk in chunks]
-    overall_sentiment = max(sentiments, key=lambda x: abs(x['score'] - 0.5))
-    return overall_sentiment
+from sentiment_engine import SentimentEngine
+from chunk_cache import ChunkCache
+from aggregate import aggregate_chunks
 
 # Start timer
 start_time = time.time()
@@ -21,34 +14,22 @@ print("Starting sentiment analysis...")
 df = pd.read_csv('../../data/vox_articles/2024_all_vox_articles.csv')
 print(f"Total articles to process: {len(df)}")
 
-# Setup model with MPS
-model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSequenceClassification.from_pretrained(model_name)
-
-# Move model to MPS device
-device = torch.device("mps")
-model = model.to(device)
+# Setup model (MPS, CUDA or CPU, whichever is available); chunk results are
+# cached so re-running with a different aggregation skips inference
+cache = ChunkCache('../../data/bert_labels/chunk_cache.sqlite', max_entries=1_000_000)
+engine = SentimentEngine(cache=cache)
 
-sentiment_analyzer = pipeline(
-    "sentiment-analysis",
-    model=model,
-    # return_all_scores=True,
-    tokenizer=tokenizer,
-    truncation=True,
-    max_length=512,
-    device=device
-)
+# Score all chunks of all articles in batches
+scores = engine.score_documents(df['text'].tolist())
+results = aggregate_chunks(scores)
 
-# Process all articles with visible progress bar
-results = []
-for index, row in tqdm(df.iterrows(), total=len(df), desc="Analyzing articles"):
-    sentiment = chunk_and_analyze(row['text'], sentiment_analyzer)
-    results.append(sentiment)
+# Keep the label and score of the chunk furthest from neutral
+df['sentiment'] = results['sentiment'].values
+df['score'] = results['score'].values
 
-# Convert results to DataFrame columns
-df['sentiment'] = [r['label'] for r in results]
-df['score'] = [r['score'] for r in results]
+print(cache.report())
+print(engine.padding.report())
+cache.close()
 
 # Calculate and display elapsed time
 elapsed_time = time.time() - start_time
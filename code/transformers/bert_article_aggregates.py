@@ -0,0 +1,75 @@
+import os
+import pandas as pd
+import time
+from datetime import timedelta
+from sentiment_engine import SentimentEngine
+from chunk_cache import ChunkCache
+from aggregate import aggregate_chunks
+from parallel import score_sharded
+from checkpoint import Checkpoint, document_ids, score_with_checkpoint
+from streaming import stream_score_csv
+
+INPUT_PATH = '../../data/vox_articles/2024_all_vox_articles.csv'
+OUTPUT_PATH = '../../data/bert_labels/vox_articles_aggregates.csv'
+CACHE_PATH = '../../data/bert_labels/chunk_cache.sqlite'
+CHECKPOINT_PATH = '../../data/bert_labels/vox_articles_aggregates.checkpoint.jsonl'
+
+# Worker processes for CPU-only machines; 1 keeps a single process on the
+# best available device (MPS, CUDA or CPU)
+WORKERS = int(os.environ.get('SENTIMENT_WORKERS', 1))
+
+# Rows read per block in streaming mode; 0 loads the whole CSV at once
+STREAM_ROWS = int(os.environ.get('SENTIMENT_STREAM_ROWS', 0))
+
+def main_streaming():
+    start_time = time.time()
+    cache = ChunkCache(CACHE_PATH, max_entries=1_000_000)
+    engine = SentimentEngine(cache=cache)
+    rows = stream_score_csv(engine, INPUT_PATH, OUTPUT_PATH, rows_per_chunk=STREAM_ROWS)
+    print(cache.report())
+    print(engine.padding.report())
+    cache.close()
+
+    elapsed_time = time.time() - start_time
+    print(f"\nScored {rows} articles in: {str(timedelta(seconds=int(elapsed_time)))}")
+    print(f"Done! Results saved to '{OUTPUT_PATH}'")
+
+def main():
+    # Start timer
+    start_time = time.time()
+    print("Starting sentiment analysis...")
+
+    # Load data
+    df = pd.read_csv(INPUT_PATH)
+    print(f"Total articles to process: {len(df)}")
+
+    # One forward pass over the corpus, then every aggregate from the same chunks
+    if WORKERS > 1:
+        scores = score_sharded(df['text'].tolist(), workers=WORKERS,
+                               cache_path=CACHE_PATH, cache_entries=1_000_000)
+    else:
+        cache = ChunkCache(CACHE_PATH, max_entries=1_000_000)
+        engine = SentimentEngine(cache=cache)
+        checkpoint = Checkpoint(CHECKPOINT_PATH)
+        scores = score_with_checkpoint(engine, df['text'].tolist(), document_ids(df, 'url'), checkpoint)
+        print(cache.report())
+        print(engine.padding.report())
+        cache.close()
+
+    results = aggregate_chunks(scores)
+    df = pd.concat([df, results.set_index(df.index)], axis=1)
+
+    elapsed_time = time.time() - start_time
+    print(f"\nProcessing completed in: {str(timedelta(seconds=int(elapsed_time)))}")
+
+    # Save to CSV
+    print("Saving results to CSV...")
+    df.to_csv(OUTPUT_PATH, index=False)
+    Checkpoint(CHECKPOINT_PATH).remove()
+    print("Done! Results saved to 'vox_articles_aggregates.csv'")
+
+if __name__ == "__main__":
+    if STREAM_ROWS > 0:
+        main_streaming()
+    else:
+        main()
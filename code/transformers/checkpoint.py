@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from sentiment_engine import ChunkScores, SentimentEngine, as_text
+
+
+def document_ids(df: pd.DataFrame, id_col: Optional[str] = None, text_col: str = 'text') -> List[str]:
+    """Checkpoint key for every row: a hash of its text, prefixed by id_col if present.
+
+    Keying on the text as well means rows sharing an id never take each
+    other's scores, and a text edited before a resume is scored again.
+    """
+    hashes = [hashlib.sha1(as_text(t).encode('utf-8')).hexdigest() for t in df[text_col]]
+    if id_col and id_col in df.columns:
+        return [f"{i}:{h}" for i, h in zip(df[id_col].astype(str), hashes)]
+    return hashes
+
+
+class Checkpoint:
+    """Append-only JSON-lines sidecar of per-document chunk scores.
+
+    Every line holds the chunk probabilities and token lengths of one scored
+    document, so an interrupted run can resume by skipping ids already
+    present, and the partial file is usable on its own. The first line is a
+    header with the settings the scores came from (see engine_settings);
+    resuming with different ones is refused rather than mixing the two.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.docs: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.labels: Optional[List[str]] = None
+        self.settings: Optional[Dict[str, Any]] = None
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        data = self.path.read_bytes()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            # Drop the last line of a run killed mid-write so appends stay valid
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+
+        for line in data[:complete].decode('utf-8').splitlines():
+            if line:
+                record = json.loads(line)
+                if 'settings' in record:
+                    self.settings = record['settings']
+                    continue
+                self.labels = record['labels']
+                self.docs[record['id']] = (np.asarray(record['probs'], dtype=np.float32),
+                                           np.asarray(record['lengths'], dtype=np.int64))
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.docs
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def check_settings(self, settings: Dict[str, Any]) -> None:
+        """Write the header of a new checkpoint, or check an existing one matches settings."""
+        if self.settings == settings:
+            return
+        if self.settings is not None or self.docs:
+            raise ValueError(f"Checkpoint '{self.path}' was written with {self.settings or 'unknown settings'}, "
+                             f"not {settings}; delete it or score with the same settings to resume")
+        self.settings = settings
+        self._append([json.dumps({'settings': settings})])
+
+    def record(self, doc_ids: Sequence[str], scores: ChunkScores) -> None:
+        """Append the scores of a group of documents and flush them to disk."""
+        bounds = np.searchsorted(scores.doc_index, np.arange(1, scores.n_docs))
+        lines = []
+        for doc_id, probs, lengths in zip(doc_ids, np.split(scores.probs, bounds),
+                                          np.split(scores.lengths, bounds)):
+            self.docs[doc_id] = (probs, lengths)
+            lines.append(json.dumps({'id': doc_id, 'labels': scores.labels,
+                                     'probs': probs.tolist(), 'lengths': lengths.tolist()}))
+        self.labels = scores.labels
+        self._append(lines)
+
+    def _append(self, lines: List[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def scores_for(self, doc_ids: Sequence[str]) -> ChunkScores:
+        """Assemble ChunkScores for doc_ids, in that order, from the checkpoint."""
+        if not doc_ids:
+            raise ValueError("No documents to assemble")
+        probs = [self.docs[d][0] for d in doc_ids]
+        lengths = [self.docs[d][1] for d in doc_ids]
+        return ChunkScores(probs=np.concatenate(probs),
+                           doc_index=np.repeat(np.arange(len(doc_ids)), [len(p) for p in probs]),
+                           lengths=np.concatenate(lengths),
+                           labels=self.labels,
+                           n_docs=len(doc_ids))
+
+    def remove(self) -> None:
+        """Delete the sidecar once the final output has been written."""
+        self.path.unlink(missing_ok=True)
+
+
+def engine_settings(engine: SentimentEngine) -> Dict[str, Any]:
+    """Everything that changes an engine's chunk scores: model, tokenizer, backend and windows."""
+    return {'namespace': engine.cache_namespace, 'max_length': engine.max_length, 'stride': engine.stride}
+
+
+def score_with_checkpoint(engine: SentimentEngine, texts: Sequence[str], doc_ids: Sequence[str],
+                          checkpoint: Checkpoint, every: int = 256) -> ChunkScores:
+    """Score documents in groups of `every`, checkpointing after each group.
+
+    Documents whose id is already in the checkpoint are skipped, so a
+    restarted run only pays for what was left.
+    """
+    checkpoint.check_settings(engine_settings(engine))
+    todo = [i for i, doc_id in enumerate(doc_ids) if doc_id not in checkpoint]
+    if len(todo) < len(doc_ids):
+        print(f"Resuming: {len(doc_ids) - len(todo)} documents already scored, {len(todo)} left")
+
+    for start in tqdm(range(0, len(todo), every), desc="Scoring documents"):
+        group = todo[start:start + every]
+        scores = engine.score_documents([texts[i] for i in group], show_progress=False)
+        checkpoint.record([doc_ids[i] for i in group], scores)
+
+    return checkpoint.scores_for(doc_ids)
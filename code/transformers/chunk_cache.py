@@ -0,0 +1,106 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# SQLite limits the number of "?" placeholders per statement
+_QUERY_BATCH = 500
+
+
+class ChunkCache:
+    """Persistent cache of per-chunk label probabilities.
+
+    Entries are keyed by a hash of (model/tokenizer namespace, chunk token
+    ids) so re-running a corpus with a different aggregation rule is a pure
+    lookup. When max_entries is set, the least recently used entries are
+    evicted on close().
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Sharded runs open one connection per worker process, so wait for
+        # other writers instead of failing on a locked database
+        self.conn = sqlite3.connect(str(self.path), timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " key BLOB PRIMARY KEY,"
+            " probs BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS chunks_last_used ON chunks (last_used)")
+        row = self.conn.execute("SELECT MAX(last_used) FROM chunks").fetchone()
+        self._clock = (row[0] or 0) + 1
+
+    @staticmethod
+    def key(namespace: str, input_ids: Sequence[int]) -> bytes:
+        """Content hash of one chunk under a model namespace."""
+        digest = hashlib.sha256(namespace.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(np.asarray(input_ids, dtype=np.int32).tobytes())
+        return digest.digest()
+
+    def get_many(self, keys: Sequence[bytes], n_labels: int) -> Dict[bytes, np.ndarray]:
+        """Look up many chunks at once, returning only the ones found."""
+        found = {}
+        for start in range(0, len(keys), _QUERY_BATCH):
+            batch = list(keys[start:start + _QUERY_BATCH])
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, probs FROM chunks WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[bytes(key)] = np.frombuffer(blob, dtype=np.float32, count=n_labels)
+
+        if found:
+            # Touch hits so they are the last to be evicted
+            self.conn.executemany("UPDATE chunks SET last_used = ? WHERE key = ?",
+                                  [(self._clock, key) for key in found])
+            self._clock += 1
+            self.conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        """Store the probabilities of newly scored chunks."""
+        rows = [(key, np.asarray(probs, dtype=np.float32).tobytes(), self._clock)
+                for key, probs in items]
+        self.conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", rows)
+        self._clock += 1
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used entries beyond max_entries."""
+        if self.max_entries is None:
+            return 0
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM chunks WHERE key IN"
+            " (SELECT key FROM chunks ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self.conn.commit()
+        return excess
+
+    def report(self) -> str:
+        """One-line summary of cache usage for this run."""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"Chunk cache: {self.hits} hits, {self.misses} misses "
+                f"({rate:.1f}% hit rate), {len(self)} entries in {self.path}")
+
+    def close(self) -> None:
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,144 @@
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality string columns stored dictionary-encoded
+CATEGORY_COLUMNS = ('sentiment', 'mean_sentiment', 'author')
+DATETIME_COLUMNS = ('datetime', 'date')
+
+# Raw text lives in a sidecar next to the scores: <stem>_text.parquet
+TEXT_COLUMNS = ('text', 'title')
+ROW_COL = 'row'
+
+
+def is_parquet(path) -> bool:
+    return Path(path).suffix == '.parquet'
+
+
+def text_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}_text.parquet")
+
+
+def typed_scores(df: pd.DataFrame, text_cols: Sequence[str] = TEXT_COLUMNS) -> pd.DataFrame:
+    """df without its text columns, with float32 scores, categorical labels and parsed dates."""
+    out = df.drop(columns=[c for c in text_cols if c in df.columns])
+    for col in out.columns:
+        # Checked by name first: an all-missing label or date column reads as float
+        if col in CATEGORY_COLUMNS:
+            out[col] = out[col].astype('string').astype('category')
+        elif col in DATETIME_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(out[col]):
+                out[col] = pd.to_datetime(out[col], format='mixed', errors='coerce')
+        elif pd.api.types.is_float_dtype(out[col]):
+            out[col] = out[col].astype(np.float32)
+    return out
+
+
+def text_frame(df: pd.DataFrame, id_col: Optional[str] = None, text_cols: Sequence[str] = TEXT_COLUMNS,
+               first_row: int = 0) -> pd.DataFrame:
+    """Row number (and id) of every document next to its text columns."""
+    out = pd.DataFrame({ROW_COL: np.arange(first_row, first_row + len(df), dtype=np.int64)})
+    if id_col and id_col in df.columns:
+        out[id_col] = df[id_col].to_numpy()
+    for col in text_cols:
+        if col in df.columns:
+            # Missing text stays null rather than becoming the string 'nan'
+            out[col] = df[col].astype('string').to_numpy(na_value=None)
+    return out
+
+
+def arrow_schema(frame: pd.DataFrame):
+    """Parquet schema for blocks shaped like frame, fixed by column role rather than inferred.
+
+    Text is always string, labels dictionary-encoded strings and dates
+    timestamps; a column with no values in frame is stored as string, since
+    any later value can be cast to it. Everything else follows its dtype.
+    """
+    import pyarrow as pa
+    fields = []
+    for col in frame.columns:
+        values = frame[col]
+        if col in TEXT_COLUMNS:
+            dtype = pa.string()
+        elif col in CATEGORY_COLUMNS:
+            dtype = pa.dictionary(pa.int32(), pa.string())
+        elif col in DATETIME_COLUMNS:
+            dtype = pa.timestamp('us')
+        elif values.isna().all():
+            dtype = pa.string()
+        elif pd.api.types.is_bool_dtype(values):
+            dtype = pa.bool_()
+        elif pd.api.types.is_integer_dtype(values):
+            dtype = pa.int64()
+        elif pd.api.types.is_float_dtype(values):
+            dtype = pa.float32()
+        else:
+            dtype = pa.string()
+        fields.append(pa.field(str(col), dtype))
+    return pa.schema(fields)
+
+
+def write_scored(df: pd.DataFrame, path, id_col: Optional[str] = None, keep_text: bool = True) -> None:
+    """Write a scored corpus: CSV as before, or Parquet scores plus an optional text sidecar."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not is_parquet(path):
+        df.to_csv(path, index=False)
+        return
+    typed_scores(df).to_parquet(path, index=False)
+    if keep_text:
+        text_frame(df, id_col).to_parquet(text_path(path), index=False)
+
+
+def read_scored(path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a scored corpus, loading only the given columns when they are known.
+
+    Parquet reads skip every other column entirely; CSV reads still parse
+    each line but only keep the requested fields.
+    """
+    if is_parquet(path):
+        if columns is not None:
+            import pyarrow.parquet as pq
+            present = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in present]
+        return pd.read_parquet(path, columns=columns)
+    if columns is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        return pd.read_csv(path, usecols=[c for c in columns if c in header])
+    return pd.read_csv(path)
+
+
+class ParquetAppender:
+    """Append blocks of a scored corpus to a Parquet file (and its text sidecar) as row groups."""
+
+    def __init__(self, path, id_col: Optional[str] = None, keep_text: bool = True):
+        self.path = Path(path)
+        self.id_col = id_col
+        self.keep_text = keep_text
+        self.rows = 0
+        self._writers = {}
+
+    def _write(self, name: str, path: Path, frame: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = self._writers.get(name)
+        if writer is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = self._writers[name] = pq.ParquetWriter(path, arrow_schema(frame))
+        # Blocks infer their own types (an all-null column comes out as null); write them as the schema says
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        writer.write_table(table.cast(writer.schema))
+
+    def append(self, block: pd.DataFrame) -> None:
+        self._write('scores', self.path, typed_scores(block))
+        if self.keep_text:
+            self._write('text', text_path(self.path), text_frame(block, self.id_col, first_row=self.rows))
+        self.rows += len(block)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
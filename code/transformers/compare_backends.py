@@ -0,0 +1,46 @@
+import argparse
+import time
+
+import pandas as pd
+import torch
+
+from backends import BACKENDS, agreement_report
+from sentiment_engine import MODEL_NAME, SentimentEngine
+
+parser = argparse.ArgumentParser(description="Check CPU backends against fp32 PyTorch")
+parser.add_argument("--data", type=str, default="../../data/vox_articles/2024_all_vox_articles.csv",
+                    help="CSV with a 'text' column to sample documents from")
+parser.add_argument("--sample", type=int, default=200, help="number of documents to compare on")
+parser.add_argument("--model", type=str, default=MODEL_NAME, help="model name or local path")
+parser.add_argument("--batch-size", type=int, default=32)
+
+
+def score_timed(engine: SentimentEngine, texts):
+    start = time.perf_counter()
+    scores = engine.score_documents(texts, show_progress=False)
+    return scores, time.perf_counter() - start
+
+
+def main():
+    args = parser.parse_args()
+    df = pd.read_csv(args.data)
+    texts = df['text'].sample(min(args.sample, len(df)), random_state=0).tolist()
+
+    # Everything on CPU so the timings are comparable
+    cpu = torch.device("cpu")
+    reference, ref_time = score_timed(
+        SentimentEngine(args.model, batch_size=args.batch_size, device=cpu), texts)
+    print(f"torch fp32: {len(reference.probs)} chunks in {ref_time:.1f}s")
+
+    for backend in BACKENDS[1:]:
+        engine = SentimentEngine(args.model, batch_size=args.batch_size, device=cpu, backend=backend)
+        scores, elapsed = score_timed(engine, texts)
+        report = agreement_report(reference.probs, scores.probs)
+        print(f"{backend}: {elapsed:.1f}s ({ref_time / elapsed:.2f}x), "
+              f"label flip rate {report['label_flip_rate'] * 100:.2f}%, "
+              f"max prob delta {report['max_prob_delta']:.4f}, "
+              f"mean prob delta {report['mean_prob_delta']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HASH_COL = 'content_hash'
+
+
+def content_hashes(texts: Sequence) -> List[str]:
+    """SHA-1 of every document's text, used to spot new or edited rows."""
+    return [hashlib.sha1(str(t).encode('utf-8')).hexdigest() for t in texts]
+
+
+def plan_incremental(df: pd.DataFrame, previous: pd.DataFrame, result_columns: Sequence[str],
+                     key_col: Optional[str] = None) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Work out which rows of df need scoring given a previous output.
+
+    df must already have a HASH_COL column. Rows are matched to the previous
+    output on key_col (e.g. url or doc_id), or on the content hash itself
+    when there is no key. A row is reused only if it was seen before with
+    the same hash and the previous output has every result column.
+
+    Returns a boolean mask of rows to score and a frame, aligned with df,
+    holding the reusable results (NaN where the row must be scored).
+    """
+    reused = pd.DataFrame(index=df.index, columns=list(result_columns))
+    todo = np.ones(len(df), dtype=bool)
+    if HASH_COL not in previous.columns or any(c not in previous.columns for c in result_columns):
+        return todo, reused
+
+    key = key_col if key_col and key_col in df.columns and key_col in previous.columns else HASH_COL
+    previous = previous.drop_duplicates(subset=key, keep='last').set_index(key, drop=False)
+
+    matched = previous.reindex(df[key].values)
+    unchanged = (matched[HASH_COL].values == df[HASH_COL].values)
+    todo = ~unchanged
+    reused = matched[list(result_columns)].set_axis(df.index)
+    reused.loc[todo] = np.nan
+    return todo, reused
+
+
+def settings_path(output_path) -> Path:
+    """Sidecar holding the scoring settings an output was written with."""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + '.settings.json')
+
+
+def read_settings(output_path) -> Optional[Dict[str, Any]]:
+    path = settings_path(output_path)
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def write_settings(output_path, settings: Dict[str, Any]) -> None:
+    settings_path(output_path).write_text(json.dumps(settings, indent=2) + '\n')
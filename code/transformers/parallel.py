@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+import torch
+
+from chunk_cache import ChunkCache
+from sentiment_engine import MODEL_NAME, ChunkScores, PaddingStats, SentimentEngine, as_text
+
+# One engine per worker process, built by _init_worker
+_engine: Optional[SentimentEngine] = None
+
+
+def _init_worker(engine_kwargs: dict, threads: int,
+                 cache_path: Optional[str], cache_entries: Optional[int]) -> None:
+    """Load a private CPU copy of the model in a worker process."""
+    global _engine
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    cache = ChunkCache(cache_path, cache_entries) if cache_path else None
+    _engine = SentimentEngine(device=torch.device("cpu"), cache=cache, **engine_kwargs)
+
+
+def _score_shard(texts: Sequence[str]) -> Tuple[ChunkScores, int, int, PaddingStats]:
+    """Score one shard, returning its chunk scores, cache hits/misses and padding."""
+    cache = _engine.cache
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    _engine.padding = PaddingStats()
+    scores = _engine.score_documents(texts, show_progress=False)
+    if cache:
+        return scores, cache.hits - hits, cache.misses - misses, _engine.padding
+    return scores, 0, 0, _engine.padding
+
+
+def score_sharded(texts: Sequence[str], workers: int,
+                  threads_per_worker: Optional[int] = None,
+                  shards_per_worker: int = 4,
+                  cache_path: Optional[str] = None,
+                  cache_entries: Optional[int] = None,
+                  **engine_kwargs) -> ChunkScores:
+    """Score documents on CPU across several worker processes.
+
+    The corpus is cut into contiguous shards (a few per worker so long
+    podcast transcripts don't leave workers idle), each worker holds its own
+    model copy with threads_per_worker intra-op threads, and the shard
+    results are merged back in the original row order.
+    """
+    texts = [as_text(t) for t in texts]
+    if not texts:
+        # Nothing to shard; only the label names are needed
+        from transformers import AutoConfig
+        config = AutoConfig.from_pretrained(engine_kwargs.get('model_name', MODEL_NAME))
+        return ChunkScores.empty([config.id2label[i] for i in range(config.num_labels)])
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    n_shards = max(1, min(len(texts), workers * shards_per_worker))
+    bounds = [len(texts) * i // n_shards for i in range(n_shards + 1)]
+    shards = [texts[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    print(f"Scoring {len(texts)} documents in {n_shards} shards "
+          f"on {workers} workers x {threads} threads")
+
+    # Spawn, not fork: forked children inherit torch's thread pools
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(engine_kwargs, threads, cache_path, cache_entries)) as pool:
+        results = list(pool.map(_score_shard, shards))
+
+    padding = PaddingStats()
+    for r in results:
+        padding.merge(r[3])
+    print(padding.report())
+
+    if cache_path:
+        hits = sum(r[1] for r in results)
+        misses = sum(r[2] for r in results)
+        cache = ChunkCache(cache_path, cache_entries)
+        cache.hits, cache.misses = hits, misses
+        print(cache.report())
+        # Workers never close their connections, so evict from here
+        cache.close()
+
+    return ChunkScores.concat([r[0] for r in results])
@@ -0,0 +1,327 @@
+import argparse
+import shlex
+import sys
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import startup
+from aggregate import AGGREGATIONS
+from backends import BACKENDS
+from chunk_cache import ChunkCache
+from sentiment_engine import MODEL_NAME, PaddingStats, SentimentEngine
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from run_metrics import RunMetrics
+
+# Resolve data paths from the repo root so the CLI works from any directory
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+LABELS_DIR = DATA_DIR / 'bert_labels'
+
+
+@dataclass
+class Corpus:
+    input_path: Path
+    id_col: str
+    output_name: str
+
+
+CORPORA = {
+    'articles': Corpus(DATA_DIR / 'vox_articles' / '2024_all_vox_articles.csv', 'url',
+                       'vox_articles_sentiment.csv'),
+    'podcasts': Corpus(DATA_DIR / 'vox_podcasts' / 'podcasts_transcripts_clean.csv', 'doc_id',
+                       'vox_podcast_sentiment.csv'),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Score Vox articles and podcasts with DistilBERT SST-2 sentiment")
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA),
+                        help="corpus to score (repeat for several; default: articles)")
+    parser.add_argument("--input", type=str,
+                        help="score this CSV instead of a named corpus")
+    parser.add_argument("--aggregation", action="append", choices=sorted(AGGREGATIONS),
+                        help="document-level columns to write (repeat for several; default: all)")
+    parser.add_argument("--output", type=str,
+                        help="output CSV or .parquet (only with a single corpus or --input)")
+    parser.add_argument("--output-dir", type=str, default=str(LABELS_DIR),
+                        help="directory for per-corpus outputs")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="format of default output names; parquet stores typed score columns "
+                             "and moves the text to a <name>_text.parquet sidecar")
+    parser.add_argument("--drop-text", action="store_true",
+                        help="with parquet output, don't write the text sidecar at all")
+    parser.add_argument("--text-col", type=str, default="text")
+    parser.add_argument("--id-col", type=str, help="stable document id column for --resume")
+
+    parser.add_argument("--model", type=str, default=MODEL_NAME, help="model name or local path")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--onnx-path", type=str, help="where to keep the exported ONNX model")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--stride", type=int, default=64, help="overlapping tokens between chunks")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="CPU worker processes, each with its own model copy")
+    parser.add_argument("--threads", type=int, help="torch threads per worker")
+
+    parser.add_argument("--cache", type=str, default=str(LABELS_DIR / 'chunk_cache.sqlite'),
+                        help="chunk result cache (SQLite)")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the chunk cache")
+    parser.add_argument("--cache-entries", type=int, default=1_000_000,
+                        help="evict least recently used chunks beyond this many")
+    parser.add_argument("--resume", action="store_true",
+                        help="checkpoint progress and skip documents an interrupted run already scored")
+    parser.add_argument("--stream-rows", type=int, default=0,
+                        help="read and write the CSV in blocks of this many rows")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only score rows that are new or changed since the existing output")
+
+    parser.add_argument("--keep-warm", action="store_true",
+                        help="after these jobs, keep the model loaded and read more argument "
+                             "lines from stdin (one run per line, Ctrl-D to quit)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print an import/model-load startup breakdown at exit")
+    parser.add_argument("--metrics", type=str,
+                        help="append per-stage timings and counts to this JSON-lines file")
+    parser.add_argument("--profile-stage", type=str,
+                        choices=["read_input", "tokenize", "inference", "score_sharded", "aggregate",
+                                 "write_output"],
+                        help="also run this stage under cProfile")
+    parser.add_argument("--profile-output", type=str,
+                        help="where to write the profile (default: <metrics>.<stage>.prof)")
+    return parser
+
+
+def check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject option combinations that one of the scoring paths would silently ignore."""
+    if args.stream_rows > 0:
+        for option, used in [('--incremental', args.incremental), ('--resume', args.resume),
+                             ('--workers', args.workers > 1)]:
+            if used:
+                parser.error(f"{option} can't be combined with --stream-rows")
+    if args.resume and args.workers > 1:
+        parser.error("--resume can't be combined with --workers > 1")
+
+
+class Scorer:
+    """Runs scoring jobs, loading the model at most once per process.
+
+    Heavy imports (pandas, torch, transformers) and model construction are
+    deferred until a job actually needs them, so --help and argument errors
+    return immediately.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.cache_path = None if args.no_cache else args.cache
+        self.metrics = RunMetrics(args.metrics, profile_stage=args.profile_stage,
+                                  profile_path=args.profile_output)
+        self._engine: Optional[SentimentEngine] = None
+        self._cache: Optional[ChunkCache] = None
+        # Run-wide totals over every engine and cache this process has used
+        self.padding = PaddingStats()
+        self.cache_stats: Optional[dict] = None
+
+    def reconfigure(self, args: argparse.Namespace) -> None:
+        """Switch to new arguments, keeping the warm model if its settings match."""
+        cache_path = None if args.no_cache else args.cache
+        old_settings = (self.engine_kwargs(), self.cache_path, self.args.cache_entries)
+        self.args = args
+        if (self.engine_kwargs(), cache_path, args.cache_entries) != old_settings:
+            self.release()
+        self.cache_path = cache_path
+
+    def engine_kwargs(self) -> dict:
+        return dict(model_name=self.args.model, batch_size=self.args.batch_size,
+                    stride=self.args.stride, backend=self.args.backend,
+                    onnx_path=self.args.onnx_path)
+
+    @property
+    def engine(self) -> SentimentEngine:
+        if self._engine is None:
+            if self.cache_path:
+                self._cache = ChunkCache(self.cache_path, self.args.cache_entries)
+            self._engine = SentimentEngine(cache=self._cache, metrics=self.metrics, **self.engine_kwargs())
+        return self._engine
+
+    def score(self, input_path: Path, output_path: Path, id_col: Optional[str]) -> int:
+        """Score one CSV and write the selected aggregations next to its columns."""
+        with startup.timed("import pandas"):
+            import numpy as np
+            import pandas as pd
+        from aggregate import aggregate_chunks, aggregation_columns, select_aggregations
+        from columnar import read_scored, write_scored
+        from incremental import HASH_COL, content_hashes, plan_incremental, read_settings, write_settings
+
+        args = self.args
+        aggregations = args.aggregation or list(AGGREGATIONS)
+
+        if args.stream_rows > 0:
+            from streaming import stream_score_csv
+            rows = stream_score_csv(self.engine, str(input_path), str(output_path),
+                                    aggregations, args.stream_rows, args.text_col,
+                                    id_col=id_col, keep_text=not args.drop_text, metrics=self.metrics)
+            write_settings(output_path, self.settings())
+            return rows
+
+        with self.metrics.stage('read_input', path=input_path) as record:
+            df = pd.read_csv(input_path)
+            df[HASH_COL] = content_hashes(df[args.text_col])
+            record['documents'] = len(df)
+        columns = aggregation_columns(aggregations)
+
+        # Rows unchanged since the last output keep their old scores
+        todo = np.ones(len(df), dtype=bool)
+        reused = None
+        if args.incremental and output_path.exists():
+            # Old scores are only comparable if the same model, backend and windows made them
+            if read_settings(output_path) != self.settings():
+                print("Existing output was scored with other settings; rescoring every row")
+            else:
+                previous = read_scored(output_path, [c for c in [id_col, HASH_COL, *columns] if c])
+                todo, reused = plan_incremental(df, previous, columns, id_col)
+        print(f"Total documents to process: {int(todo.sum())} of {len(df)}")
+
+        checkpoint = None
+        results = reused if reused is not None else pd.DataFrame(index=df.index)
+        if todo.any():
+            todo_df = df[todo]
+            scores, checkpoint = self._score_texts(todo_df, id_col, output_path)
+            with self.metrics.stage('aggregate', documents=len(todo_df), chunks=len(scores.probs)):
+                fresh = select_aggregations(aggregate_chunks(scores), aggregations)
+                fresh = fresh.set_axis(todo_df.index)
+            if reused is None:
+                results = fresh
+            else:
+                results = results.astype(object)
+                results.loc[todo, fresh.columns] = fresh
+                results = results.astype(fresh.dtypes.to_dict())
+        df = pd.concat([df, results], axis=1)
+
+        with self.metrics.stage('write_output', path=output_path, documents=len(df)):
+            write_scored(df, output_path, id_col, keep_text=not args.drop_text)
+        write_settings(output_path, self.settings())
+        if checkpoint is not None:
+            checkpoint.remove()
+        return len(df)
+
+    def settings(self) -> dict:
+        """Model, tokenizer, backend and window settings the scores come from.
+
+        Sharded runs never load the model here, so only its config and
+        tokenizer are read for them.
+        """
+        if self._engine is None and self.args.workers > 1:
+            from sentiment_engine import scoring_settings
+            return scoring_settings(self.args.model, self.args.backend, stride=self.args.stride)
+        from checkpoint import engine_settings
+        return engine_settings(self.engine)
+
+    def _score_texts(self, df, id_col: Optional[str], output_path: Path):
+        """Chunk scores for df's texts, plus the checkpoint used (if any)."""
+        args = self.args
+        texts = df[args.text_col].tolist()
+        if args.workers > 1:
+            from parallel import score_sharded
+            # Workers keep no metrics of their own; the whole pool is one stage here
+            with self.metrics.stage('score_sharded', documents=len(texts), workers=args.workers) as record:
+                scores = score_sharded(texts, workers=args.workers, threads_per_worker=args.threads,
+                                       cache_path=self.cache_path, cache_entries=args.cache_entries,
+                                       **self.engine_kwargs())
+                record.update(chunks=len(scores.probs), tokens=int(scores.lengths.sum()))
+            return scores, None
+        if args.resume:
+            from checkpoint import Checkpoint, document_ids, score_with_checkpoint
+            checkpoint = Checkpoint(str(output_path) + '.checkpoint.jsonl')
+            scores = score_with_checkpoint(self.engine, texts,
+                                           document_ids(df, id_col, args.text_col), checkpoint)
+            return scores, checkpoint
+        return self.engine.score_documents(texts), None
+
+    def release(self) -> None:
+        """Report on and drop the current engine and cache, adding them to the run totals."""
+        if self._engine is not None:
+            print(self._engine.padding.report())
+            self.padding.merge(self._engine.padding)
+        if self._cache is not None:
+            print(self._cache.report())
+            stats = self.cache_stats or {'cache_hits': 0, 'cache_misses': 0}
+            stats['cache_hits'] += self._cache.hits
+            stats['cache_misses'] += self._cache.misses
+            self.cache_stats = stats
+            self._cache.close()
+        self._engine = None
+        self._cache = None
+
+    def close(self) -> None:
+        """Release the engine and write the run summary; called once, at exit."""
+        self.release()
+        summary = {'startup': startup.TIMINGS}
+        if self.padding.batches:
+            summary['padding_ratio'] = round(1 - self.padding.efficiency, 4)
+        summary.update(self.cache_stats or {})
+        self.metrics.close(**summary)
+
+
+def run_jobs(scorer: Scorer, args: argparse.Namespace) -> None:
+    """Score every corpus (or the --input CSV) requested by args."""
+    output_dir = Path(args.output_dir)
+    suffix = '.' + args.format
+
+    # (input, output, id column) for every job in this run
+    if args.input:
+        jobs = [(Path(args.input), Path(args.output or output_dir / f"{Path(args.input).stem}_sentiment{suffix}"),
+                 args.id_col)]
+    else:
+        names = args.corpus or ['articles']
+        if args.output and len(names) > 1:
+            raise SystemExit("--output only works with a single corpus; use --output-dir")
+        jobs = [(CORPORA[n].input_path,
+                 Path(args.output or (output_dir / CORPORA[n].output_name).with_suffix(suffix)),
+                 args.id_col or CORPORA[n].id_col) for n in names]
+
+    for input_path, output_path, id_col in jobs:
+        start_time = time.time()
+        print(f"Scoring {input_path}...")
+        with scorer.metrics.stage('job', input=input_path, output=output_path) as record:
+            rows = scorer.score(input_path, output_path, id_col)
+            record['documents'] = rows
+        elapsed = timedelta(seconds=int(time.time() - start_time))
+        print(f"Done! {rows} rows saved to '{output_path}' in {elapsed}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+
+    scorer = Scorer(args)
+    try:
+        run_jobs(scorer, args)
+
+        if args.keep_warm:
+            print("Model is warm; enter arguments for the next run (Ctrl-D to quit)")
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+                try:
+                    job_args = parser.parse_args(shlex.split(line))
+                    check_args(parser, job_args)
+                except SystemExit:
+                    # argparse already printed the error or --help
+                    continue
+                scorer.reconfigure(job_args)
+                try:
+                    run_jobs(scorer, job_args)
+                except (Exception, SystemExit) as e:
+                    print(f"An error occurred: {str(e)}")
+    finally:
+        scorer.close()
+        if args.timings:
+            print(startup.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import hashlib
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from backends import load_backend
+from chunk_cache import ChunkCache
+from startup import timed
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from run_metrics import NULL_METRICS, RunMetrics
+
+# torch and transformers take seconds to import, so they are only loaded
+# once a SentimentEngine is actually built
+if TYPE_CHECKING:
+    import torch
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+
+
+def get_device() -> 'torch.device':
+    """Pick the best available device (MPS, then CUDA, then CPU)."""
+    import torch
+    if torch.backends.mps.is_available():
+        return torch.device("mps")
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    return torch.device("cpu")
+
+
+def directory_fingerprint(directory: Path) -> str:
+    """Short hash of the name, size and mtime of every file under directory."""
+    digest = hashlib.sha256()
+    for path in sorted(p for p in Path(directory).rglob('*') if p.is_file()):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(directory)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def model_revision(model_name: str, config) -> str:
+    """Hub commit of a model, or a fingerprint of its files for a local directory.
+
+    A local path has no commit, so overwriting its weights or config changes
+    the fingerprint instead.
+    """
+    if Path(model_name).is_dir():
+        return directory_fingerprint(Path(model_name))
+    revision = getattr(config, '_commit_hash', None)
+    if revision:
+        return revision
+    try:
+        # Hub downloads live in .../snapshots/<commit>/
+        from transformers.utils import cached_file
+        return Path(cached_file(model_name, 'config.json')).parent.name
+    except (ImportError, OSError):
+        return 'unknown'
+
+
+def tokenizer_revision(tokenizer) -> str:
+    """Short hash of a fast tokenizer's full definition (vocab, normalizer, post-processor)."""
+    return hashlib.sha256(tokenizer.backend_tokenizer.to_str().encode()).hexdigest()[:12]
+
+
+def cache_namespace(model_name: str, revision: str, tokenizer, backend: str) -> str:
+    """Prefix of every chunk cache key; changes whenever the model, tokenizer or backend does."""
+    return f"{model_name}@{revision}:{type(tokenizer).__name__}@{tokenizer_revision(tokenizer)}:{backend}"
+
+
+def scoring_settings(model_name: str = MODEL_NAME, backend: str = 'torch',
+                     max_length: int = 512, stride: int = 64) -> dict:
+    """What a SentimentEngine with these arguments would record as its settings.
+
+    Only the config and tokenizer are loaded, not the model weights.
+    """
+    from transformers import AutoConfig, AutoTokenizer
+    config = AutoConfig.from_pretrained(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return {'namespace': cache_namespace(model_name, model_revision(model_name, config), tokenizer, backend),
+            'max_length': max_length, 'stride': stride}
+
+
+def as_text(value) -> str:
+    """A document's text, with missing values (None or NaN from read_csv) as ''."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+@dataclass
+class ChunkScores:
+    """Per-chunk label probabilities for a list of documents.
+
+    Chunks are stored flat and in document order; doc_index maps every chunk
+    back to the row it came from and lengths holds its token count.
+    """
+    probs: np.ndarray       # (n_chunks, n_labels)
+    doc_index: np.ndarray   # (n_chunks,)
+    lengths: np.ndarray     # (n_chunks,)
+    labels: List[str]
+    n_docs: int
+
+    def label_column(self, label: str) -> np.ndarray:
+        """Probabilities of one label for every chunk."""
+        return self.probs[:, self.labels.index(label)]
+
+    @classmethod
+    def empty(cls, labels: List[str]) -> 'ChunkScores':
+        """Scores of zero documents."""
+        return cls(probs=np.empty((0, len(labels)), dtype=np.float32),
+                   doc_index=np.empty(0, dtype=np.int64),
+                   lengths=np.empty(0, dtype=np.int64),
+                   labels=list(labels),
+                   n_docs=0)
+
+    @classmethod
+    def concat(cls, parts: Sequence['ChunkScores']) -> 'ChunkScores':
+        """Join scores of consecutive document shards, keeping row order."""
+        offsets = np.cumsum([0] + [p.n_docs for p in parts[:-1]])
+        return cls(probs=np.concatenate([p.probs for p in parts]),
+                   doc_index=np.concatenate([p.doc_index + off for p, off in zip(parts, offsets)]),
+                   lengths=np.concatenate([p.lengths for p in parts]),
+                   labels=parts[0].labels,
+                   n_docs=sum(p.n_docs for p in parts))
+
+    def split(self) -> List[np.ndarray]:
+        """Per-document (n_chunks_i, n_labels) probability matrices."""
+        bounds = np.searchsorted(self.doc_index, np.arange(1, self.n_docs))
+        return np.split(self.probs, bounds)
+
+
+@dataclass
+class PaddingStats:
+    """Real vs padded tokens across every batch sent to the model."""
+    real_tokens: int = 0
+    total_tokens: int = 0
+    batches: int = 0
+
+    def add(self, attention_mask) -> None:
+        self.real_tokens += int(attention_mask.sum())
+        self.total_tokens += int(attention_mask.numel())
+        self.batches += 1
+
+    def merge(self, other: 'PaddingStats') -> None:
+        self.real_tokens += other.real_tokens
+        self.total_tokens += other.total_tokens
+        self.batches += other.batches
+
+    @property
+    def efficiency(self) -> float:
+        """Share of the computed tokens that were real (1.0 = no padding)."""
+        return self.real_tokens / self.total_tokens if self.total_tokens else 1.0
+
+    def report(self) -> str:
+        return (f"Padding: {self.real_tokens} real of {self.total_tokens} tokens in "
+                f"{self.batches} batches ({self.efficiency:.1%} efficiency)")
+
+
+def length_sorted_batches(lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    """Positions into lengths, grouped into batches of similar length.
+
+    Sorting by length before cutting batches means each batch is padded to
+    the longest of its neighbours rather than to the longest in the corpus,
+    so full 512-token podcast windows and short article chunks never share
+    a batch.
+    """
+    order = np.argsort(lengths, kind='stable')
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+class SentimentEngine:
+    """Batched sentiment scoring with a sequence classification model.
+
+    Each document is tokenized once and its input_ids are sliced into
+    max_length windows overlapping by stride tokens, so no chunk is ever
+    truncated. Windows from many documents are gathered into batches of
+    batch_size and run through the model in one forward pass per batch.
+
+    With a ChunkCache, windows already scored by the same model, tokenizer
+    and backend are looked up instead of re-inferred. backend selects fp32
+    PyTorch ('torch'), dynamic int8 quantization ('int8') or ONNX Runtime
+    ('onnx'); the latter two always run on CPU.
+
+    With sort_by_length (the default) chunks are batched with others of
+    similar token length; padding tracks how much of each batch was real.
+    score_documents records 'tokenize' and 'inference' stages in metrics.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = 32,
+                 max_length: int = 512, stride: int = 64,
+                 device: Optional['torch.device'] = None,
+                 cache: Optional[ChunkCache] = None,
+                 backend: str = 'torch', onnx_path: Optional[str] = None,
+                 sort_by_length: bool = True, metrics: Optional[RunMetrics] = None):
+        with timed("import torch"):
+            import torch
+        with timed("import transformers"):
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.stride = stride
+        self.backend_name = backend
+        self.device = torch.device("cpu") if backend != 'torch' else (device or get_device())
+        self.cache = cache
+        self.sort_by_length = sort_by_length
+        self.padding = PaddingStats()
+        self.metrics = metrics or NULL_METRICS
+
+        with timed("load tokenizer"):
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if not self.tokenizer.is_fast:
+            raise ValueError(f"{model_name} has no fast tokenizer; token windows need one")
+        with timed("load model"):
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            self.model.eval()
+        config = self.model.config
+        self.labels = [config.id2label[i] for i in range(config.num_labels)]
+        self.model_revision = model_revision(model_name, config)
+
+        with timed(f"set up {backend} backend"):
+            self.backend = load_backend(backend, self.model, self.tokenizer, self.device, onnx_path,
+                                        revision=self.model_revision)
+
+        # Cache keys change whenever the model, tokenizer or backend does
+        self.cache_namespace = cache_namespace(model_name, self.model_revision, self.tokenizer, backend)
+
+    def _forward(self, encoded) -> np.ndarray:
+        """Run one forward pass and return softmax probabilities."""
+        self.padding.add(encoded['attention_mask'])
+        logits = self.backend(encoded)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Score a batch of raw texts, truncating each at max_length tokens."""
+        encoded = self.tokenizer([as_text(t) for t in texts], padding=True, truncation=True,
+                                 max_length=self.max_length, return_tensors='pt')
+        return self._forward(encoded)
+
+    def predict_ids(self, input_ids: Sequence[List[int]]) -> np.ndarray:
+        """Score a batch of already tokenized windows."""
+        encoded = self.tokenizer.pad({'input_ids': list(input_ids)}, return_tensors='pt')
+        return self._forward(encoded)
+
+    def predict_texts(self, texts: Sequence[str], desc: str = "Scoring",
+                      show_progress: bool = True) -> np.ndarray:
+        """Score a list of texts in batches, returning (len(texts), n_labels)."""
+        probs = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        # Character count is a cheap stand-in for token count here
+        lengths = np.fromiter((len(as_text(t)) for t in texts), dtype=np.int64, count=len(texts))
+        for idx in tqdm(self._batches(lengths), desc=desc, disable=not show_progress):
+            probs[idx] = self.predict_proba([texts[i] for i in idx])
+        return probs
+
+    def _batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """Batches of positions into lengths, length-sorted unless disabled."""
+        if self.sort_by_length:
+            return length_sorted_batches(lengths, self.batch_size)
+        order = np.arange(len(lengths))
+        return [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+
+    def chunk_documents(self, texts: Sequence[str]) -> Tuple[List[List[int]], np.ndarray]:
+        """Tokenize every document once and cut it into overlapping windows.
+
+        Returns the input_ids of every window (special tokens included) and
+        the index of the document each window came from. Empty documents
+        still yield one [CLS] [SEP] window so every row gets a score; missing
+        texts count as empty rather than as the word 'nan'.
+        """
+        encoded = self.tokenizer([as_text(t) for t in texts], truncation=True,
+                                 max_length=self.max_length, stride=self.stride,
+                                 return_overflowing_tokens=True)
+        doc_index = np.asarray(encoded['overflow_to_sample_mapping'], dtype=np.int64)
+        return encoded['input_ids'], doc_index
+
+    def score_documents(self, texts: Sequence[str], show_progress: bool = True) -> ChunkScores:
+        """Chunk every document, score all chunks in batches and map them back."""
+        if len(texts) == 0:
+            return ChunkScores.empty(self.labels)
+        with self.metrics.stage('tokenize', documents=len(texts)) as record:
+            windows, doc_index = self.chunk_documents(texts)
+            lengths = np.fromiter((len(w) for w in windows), dtype=np.int64, count=len(windows))
+            record.update(chunks=len(windows), tokens=int(lengths.sum()))
+        probs = np.empty((len(windows), len(self.labels)), dtype=np.float32)
+
+        with self.metrics.stage('inference', documents=len(texts), chunks=len(windows)) as record:
+            # Only windows missing from the cache go through the model
+            todo = np.arange(len(windows))
+            if self.cache is not None:
+                keys = [ChunkCache.key(self.cache_namespace, w) for w in windows]
+                cached = self.cache.get_many(keys, len(self.labels))
+                hit = np.fromiter((k in cached for k in keys), dtype=bool, count=len(keys))
+                if hit.any():
+                    probs[hit] = np.stack([cached[k] for k, h in zip(keys, hit) if h])
+                todo = todo[~hit]
+
+            real, total, batches = self.padding.real_tokens, self.padding.total_tokens, self.padding.batches
+            for batch in tqdm(self._batches(lengths[todo]), desc="Scoring chunks", disable=not show_progress):
+                idx = todo[batch]
+                probs[idx] = self.predict_ids([windows[i] for i in idx])
+
+            if self.cache is not None and len(todo):
+                self.cache.put_many((keys[i], probs[i]) for i in todo)
+
+            # Padding of this call only: the running totals minus where they started
+            real = self.padding.real_tokens - real
+            total = self.padding.total_tokens - total
+            record.update(cache_hits=len(windows) - len(todo), batches=self.padding.batches - batches,
+                          tokens=real, padded_tokens=total,
+                          padding_ratio=round(1 - real / total, 4) if total else 0.0)
+        self.metrics.count('documents', len(texts))
+        self.metrics.count('chunks', len(windows))
+        self.metrics.count('tokens', int(lengths.sum()))
+        self.metrics.count('cache_hits', len(windows) - len(todo))
+
+        return ChunkScores(probs=probs,
+                           doc_index=doc_index,
+                           lengths=lengths,
+                           labels=self.labels,
+                           n_docs=len(texts))
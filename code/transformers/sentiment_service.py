@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+import startup
+from aggregate import aggregate_chunks
+from backends import BACKENDS
+from sentiment_engine import MODEL_NAME, SentimentEngine
+
+# Same document-level fields the batch scripts write
+RESPONSE_COLUMNS = ['sentiment', 'score', 'pos_score', 'neg_score',
+                    'mean_score', 'intensity', 'chunks_analyzed']
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """Collects documents from concurrent requests into model batches.
+
+    A batch is sent to the model as soon as max_docs documents are waiting
+    or max_wait_ms has passed since the first of them arrived, whichever
+    comes first. Inference runs in a worker thread so the event loop keeps
+    accepting requests meanwhile.
+    """
+
+    def __init__(self, engine: SentimentEngine, max_docs: int = 64, max_wait_ms: float = 20.0,
+                 history: int = 10_000):
+        self.engine = engine
+        self.max_docs = max_docs
+        self.max_wait = max_wait_ms / 1000
+        self.queue: 'asyncio.Queue[Tuple[str, asyncio.Future]]' = asyncio.Queue()
+        self.batch_sizes: Deque[int] = deque(maxlen=history)
+        self.latencies: Deque[float] = deque(maxlen=history)
+        self.requests = 0
+        self.documents = 0
+
+    async def score(self, texts: List[str]) -> List[dict]:
+        """Queue a request's documents and wait for their results."""
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self.queue.put((text, future))
+            futures.append(future)
+        results = await asyncio.gather(*futures)
+
+        self.requests += 1
+        self.documents += len(texts)
+        self.latencies.append(time.perf_counter() - start)
+        return results
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_docs:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self._score_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batch_sizes.append(len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _score_batch(self, texts: List[str]) -> List[dict]:
+        scores = self.engine.score_documents(texts, show_progress=False)
+        results = aggregate_chunks(scores)
+        columns = [c for c in RESPONSE_COLUMNS if c in results.columns]
+        return json.loads(results[columns].to_json(orient='records'))
+
+    def stats(self) -> dict:
+        latencies = np.asarray(self.latencies) * 1000
+        sizes = np.asarray(self.batch_sizes)
+        return {
+            'requests': self.requests,
+            'documents': self.documents,
+            'batches': len(self.batch_sizes),
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if latencies.size else None,
+                'p99': float(np.percentile(latencies, 99)) if latencies.size else None,
+            },
+            'batch_size': {
+                'mean': float(sizes.mean()) if sizes.size else None,
+                'max': int(sizes.max()) if sizes.size else None,
+            },
+            'queued': self.queue.qsize(),
+        }
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Parse a minimal HTTP/1.1 request: method, path and body."""
+    request_line = (await reader.readline()).decode('latin-1').strip()
+    method, path, _ = request_line.split(' ', 2)
+    length = 0
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-length':
+            length = int(value.strip())
+    body = await reader.readexactly(length) if length else b''
+    return method, path, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+    body = json.dumps(payload).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n")
+    writer.write(head.encode('latin-1') + body)
+
+
+def make_handler(batcher: MicroBatcher):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await read_request(reader)
+            if path == '/score':
+                if method != 'POST':
+                    write_response(writer, 405, {'error': 'POST a JSON body to /score'})
+                else:
+                    request = json.loads(body or b'{}')
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                    # Accept {"text": "..."} or {"documents": ["...", ...]}
+                    texts = request.get('documents')
+                    if texts is None and 'text' in request:
+                        texts = [request['text']]
+                    if not isinstance(texts, list) or not texts:
+                        write_response(writer, 400, {'error': "expected 'text' or a list of 'documents'"})
+                    else:
+                        results = await batcher.score([str(t) for t in texts])
+                        write_response(writer, 200, {'results': results})
+            elif path == '/stats':
+                write_response(writer, 200, batcher.stats())
+            elif path == '/health':
+                write_response(writer, 200, {'status': 'ok'})
+            else:
+                write_response(writer, 404, {'error': f'no route {path}'})
+        except (ValueError, json.JSONDecodeError) as e:
+            write_response(writer, 400, {'error': str(e)})
+        except Exception as e:
+            write_response(writer, 500, {'error': str(e)})
+        finally:
+            try:
+                await writer.drain()
+            finally:
+                writer.close()
+
+    return handle
+
+
+async def serve(engine: SentimentEngine, host: str, port: int,
+                max_docs: int, max_wait_ms: float) -> None:
+    batcher = MicroBatcher(engine, max_docs=max_docs, max_wait_ms=max_wait_ms)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(make_handler(batcher), host, port)
+    print(f"Serving sentiment on http://{host}:{port} (POST /score, GET /stats)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local HTTP sentiment scoring service")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="interface to bind (localhost only by default)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", type=str, default=MODEL_NAME, help="model name or local path")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--batch-size", type=int, default=32, help="chunks per forward pass")
+    parser.add_argument("--max-batch-docs", type=int, default=64,
+                        help="most documents collected into one micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=20.0,
+                        help="latency budget for filling a micro-batch")
+    args = parser.parse_args(argv)
+
+    engine = SentimentEngine(args.model, batch_size=args.batch_size, backend=args.backend)
+    print(startup.report())
+    try:
+        asyncio.run(serve(engine, args.host, args.port, args.max_batch_docs, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
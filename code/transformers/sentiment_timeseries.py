@@ -0,0 +1,198 @@
+import argparse
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from sentiment_engine import MODEL_NAME, ChunkScores, SentimentEngine
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from run_metrics import NULL_METRICS, RunMetrics
+from transcript_loader import load_transcripts
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+
+
+@dataclass
+class SentimentSeries:
+    """Sentiment over narrative time for many documents, stored CSR-style.
+
+    The points of document d are position[offsets[d]:offsets[d + 1]] and
+    score[offsets[d]:offsets[d + 1]]; position is the relative location of a
+    chunk or paragraph in its document (0 = start, 1 = end) and score is
+    P(positive) - P(negative). Everything lives in flat contiguous arrays
+    so smoothing runs over all documents at once.
+    """
+    doc_ids: np.ndarray     # (n_docs,)
+    offsets: np.ndarray     # (n_docs + 1,)
+    position: np.ndarray    # (n_points,)
+    score: np.ndarray       # (n_points,)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def doc_index(self) -> np.ndarray:
+        """Document number of every point."""
+        return np.repeat(np.arange(self.n_docs), self.lengths())
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, doc_ids=self.doc_ids.astype(str), offsets=self.offsets,
+                 position=self.position, score=self.score)
+
+    @classmethod
+    def load(cls, path: str) -> 'SentimentSeries':
+        with np.load(path) as f:
+            return cls(f['doc_ids'], f['offsets'], f['position'], f['score'])
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """Centered rolling mean within each document (windows never cross documents).
+
+        Uses one cumulative sum over the flat scores, so the cost does not
+        depend on the window size.
+        """
+        idx = np.arange(len(self.score))
+        doc = self.doc_index()
+        start = self.offsets[:-1][doc]
+        end = self.offsets[1:][doc]
+        lo = np.maximum(start, idx - window // 2)
+        hi = np.minimum(end, idx + (window - 1) // 2 + 1)
+        csum = np.concatenate([[0.0], np.cumsum(self.score, dtype=np.float64)])
+        return ((csum[hi] - csum[lo]) / (hi - lo)).astype(np.float32)
+
+    def narrative_arcs(self, low_pass_size: int = 5, points: int = 100,
+                       scale: bool = False) -> np.ndarray:
+        """Low-pass DCT arcs in the style of syuzhet::get_dct_transform.
+
+        Each document's scores are projected onto their first low_pass_size
+        DCT-II components and the smooth curve is evaluated at `points`
+        evenly spaced narrative positions. Returns (n_docs, points); with
+        scale=True every arc is rescaled to [-1, 1].
+        """
+        lengths = self.lengths()
+        doc = self.doc_index()
+        n = np.arange(len(self.score)) - self.offsets[:-1][doc]
+        k = np.arange(low_pass_size)
+
+        # DCT-II coefficients of every document, accumulated point by point
+        basis = np.cos(np.pi * np.outer((n + 0.5) / lengths[doc], k))
+        coeffs = np.zeros((self.n_docs, low_pass_size))
+        np.add.at(coeffs, doc, basis * self.score[:, None])
+
+        # Inverse DCT restricted to the kept components, at continuous positions
+        u = (np.arange(points) + 0.5) / points
+        weights = np.where(k == 0, 1.0, 2.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            arcs = (coeffs * weights / lengths[:, None]) @ np.cos(np.pi * np.outer(k, u))
+
+        if scale:
+            lo = arcs.min(axis=1, keepdims=True)
+            span = arcs.max(axis=1, keepdims=True) - lo
+            with np.errstate(invalid='ignore', divide='ignore'):
+                arcs = np.where(span > 0, 2 * (arcs - lo) / span - 1, 0.0)
+        arcs[lengths == 0] = np.nan
+        return arcs
+
+
+def _polarity(scores: ChunkScores) -> np.ndarray:
+    return scores.label_column('POSITIVE') - scores.label_column('NEGATIVE')
+
+
+def series_from_chunks(scores: ChunkScores, doc_ids: Sequence[str]) -> SentimentSeries:
+    """One point per chunk, placed at the chunk's centre in its document."""
+    counts = np.bincount(scores.doc_index, minlength=scores.n_docs)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    rank = np.arange(len(scores.doc_index)) - offsets[:-1][scores.doc_index]
+    position = (rank + 0.5) / counts[scores.doc_index]
+    return SentimentSeries(np.asarray(doc_ids, dtype=str), offsets,
+                           position.astype(np.float32), _polarity(scores).astype(np.float32))
+
+
+def series_from_paragraphs(engine: SentimentEngine,
+                           paragraphs: Dict[str, List[str]]) -> SentimentSeries:
+    """One point per paragraph, scored as a document of its own.
+
+    Paragraphs from all documents are scored together in batches; a
+    paragraph longer than the model limit gets the mean of its chunks.
+    """
+    doc_ids = list(paragraphs)
+    flat = [p for doc in doc_ids for p in paragraphs[doc]]
+    counts = np.array([len(paragraphs[doc]) for doc in doc_ids], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    scores = engine.score_documents(flat)
+    polarity = _polarity(scores)
+    per_paragraph = (np.bincount(scores.doc_index, weights=polarity, minlength=scores.n_docs)
+                     / np.bincount(scores.doc_index, minlength=scores.n_docs))
+
+    # Position is the paragraph's centre, in characters, within its document
+    chars = np.array([len(p) for p in flat], dtype=np.float64)
+    doc = np.repeat(np.arange(len(doc_ids)), counts)
+    ends = np.cumsum(chars)
+    doc_start = np.concatenate([[0.0], ends])[offsets[:-1]][doc]
+    doc_total = np.bincount(doc, weights=chars, minlength=len(doc_ids))[doc]
+    position = (ends - chars / 2 - doc_start) / np.maximum(doc_total, 1)
+
+    return SentimentSeries(np.asarray(doc_ids, dtype=str), offsets,
+                           position.astype(np.float32), per_paragraph.astype(np.float32))
+
+
+def read_docx_paragraphs(directory: str, metrics: RunMetrics = NULL_METRICS) -> Dict[str, List[str]]:
+    """Non-empty paragraphs of every .docx transcript, keyed by file name."""
+    return {t.name: [p.strip() for p in t.paragraphs if p.strip()]
+            for t in load_transcripts(directory, metrics=metrics)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sentiment time series within articles and podcasts")
+    parser.add_argument("--docx-dir", type=str, default=str(DATA_DIR / 'vox_podcasts' / '2024'),
+                        help="score every paragraph of the .docx transcripts in this directory")
+    parser.add_argument("--input", type=str,
+                        help="score every chunk of this CSV's text column instead")
+    parser.add_argument("--id-col", type=str, default="url")
+    parser.add_argument("--output", type=str,
+                        default=str(DATA_DIR / 'bert_labels' / 'vox_podcast_paragraph_series.npz'))
+    parser.add_argument("--arcs-csv", type=str,
+                        help="also write the DCT narrative arcs (one row per document) here")
+    parser.add_argument("--low-pass-size", type=int, default=5)
+    parser.add_argument("--model", type=str, default=MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--metrics", type=str,
+                        help="append per-stage timings and counts to this JSON-lines file")
+    parser.add_argument("--profile-stage", type=str,
+                        choices=["transcript_cache", "parse_docx", "tokenize", "inference", "arcs",
+                                 "write_output"],
+                        help="also run this stage under cProfile (saved next to --metrics)")
+    args = parser.parse_args(argv)
+
+    metrics = RunMetrics(args.metrics, profile_stage=args.profile_stage)
+    engine = SentimentEngine(args.model, batch_size=args.batch_size, metrics=metrics)
+    if args.input:
+        import pandas as pd
+        df = pd.read_csv(args.input)
+        ids = df[args.id_col].astype(str) if args.id_col in df.columns else df.index.astype(str)
+        series = series_from_chunks(engine.score_documents(df['text'].tolist()), ids)
+    else:
+        series = series_from_paragraphs(engine, read_docx_paragraphs(args.docx_dir, metrics))
+
+    with metrics.stage('write_output', path=args.output, documents=series.n_docs, points=len(series.score)):
+        series.save(args.output)
+    print(f"Saved {len(series.score)} points for {series.n_docs} documents to '{args.output}'")
+
+    if args.arcs_csv:
+        import pandas as pd
+        with metrics.stage('arcs', documents=series.n_docs):
+            arcs = series.narrative_arcs(args.low_pass_size, scale=True)
+            pd.DataFrame(arcs, index=pd.Index(series.doc_ids, name='doc_id')).to_csv(args.arcs_csv)
+        print(f"Narrative arcs saved to '{args.arcs_csv}'")
+    metrics.close(padding_ratio=round(1 - engine.padding.efficiency, 4))
+
+
+if __name__ == "__main__":
+    main()
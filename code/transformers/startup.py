@@ -0,0 +1,26 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# Taken when the first scoring module is imported, close enough to process start
+_PROCESS_START = time.perf_counter()
+
+TIMINGS: Dict[str, float] = {}
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Add the wall time of the enclosed block to TIMINGS[stage]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[stage] = TIMINGS.get(stage, 0.0) + time.perf_counter() - start
+
+
+def report() -> str:
+    """Startup breakdown, one stage per line, in the order stages first ran."""
+    lines = ["Startup breakdown:"]
+    lines += [f"  {stage:<28}{seconds:8.2f}s" for stage, seconds in TIMINGS.items()]
+    lines.append(f"  {'total since start':<28}{time.perf_counter() - _PROCESS_START:8.2f}s")
+    return '\n'.join(lines)
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+from tqdm import tqdm
+
+from aggregate import aggregate_chunks, select_aggregations
+from columnar import ParquetAppender, is_parquet
+from sentiment_engine import SentimentEngine
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from run_metrics import NULL_METRICS, RunMetrics
+
+
+def stream_score_csv(engine: SentimentEngine, input_path: str, output_path: str,
+                     aggregations: Optional[Sequence[str]] = None,
+                     rows_per_chunk: int = 1000, text_col: str = 'text',
+                     id_col: Optional[str] = None, keep_text: bool = True,
+                     metrics: RunMetrics = NULL_METRICS) -> int:
+    """Score a CSV too large for memory, appending results as it goes.
+
+    The input is read rows_per_chunk rows at a time; each block is chunked,
+    scored and aggregated, then appended to output_path, so peak memory is
+    bounded by the block size rather than the corpus size. A .parquet
+    output gets one row group per block. Returns the number of rows written.
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    parquet = ParquetAppender(output_path, id_col, keep_text) if is_parquet(output_path) else None
+    written = 0
+    reader = pd.read_csv(input_path, chunksize=rows_per_chunk)
+    for block in tqdm(reader, desc=f"Scoring {Path(input_path).name}", unit="block"):
+        block = block.reset_index(drop=True)
+        scores = engine.score_documents(block[text_col].tolist(), show_progress=False)
+        with metrics.stage('aggregate', documents=len(block), chunks=len(scores.probs)):
+            results = aggregate_chunks(scores)
+            if aggregations:
+                results = select_aggregations(results, aggregations)
+
+        # The first block replaces any old output and writes the header
+        out = pd.concat([block, results], axis=1)
+        with metrics.stage('write_output', path=output_path, documents=len(out)):
+            if parquet is not None:
+                parquet.append(out)
+            else:
+                out.to_csv(output_path, mode='a' if written else 'w', header=not written, index=False)
+        written += len(out)
+
+    if parquet is not None:
+        parquet.close()
+    return written
@@ -1,14 +1,17 @@
+import argparse
 import os
-import re
+import sys
 from collections import Counter
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import pandas as pd
 import seaborn as sns
-from nltk.corpus import stopwords
 import nltk
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from doc_term_matrix import load_store
+
 def setup_nltk():
     """Download required NLTK data if not already present."""
     try:
@@ -16,43 +19,13 @@ def setup_nltk():
     except LookupError:
         nltk.download('stopwords', quiet=True)
 
-def tokenize_and_filter(text):
-    """Clean, tokenize, and remove stop words from text."""
-    stop_words = set(stopwords.words('english'))
-    # Add custom stop words relevant to news articles
-    custom_stop_words = {'com', 'vox', 'www', 'https', 'article', 'news'}
-    stop_words.update(custom_stop_words)
-
-    # Convert to string in case input is not string
-    text = str(text)
-
-    # Remove URLs
-    text = re.sub(r'http\S+|www.\S+', '', text)
-
-    # Remove non-word characters
-    text = re.sub(r'\W+', ' ', text)
-
-    tokens = text.lower().split()
-    return [word for word in tokens if word not in stop_words and len(word) > 1]
-
-def process_csv_data(csv_file):
-    """Process CSV file and return word counts."""
+def process_csv_data(csv_file, start=None, end=None):
+    """Return word counts of the articles (title and text) published between start and end."""
     try:
-        # Read CSV file
-        df = pd.read_csv(csv_file)
-
-        # Combine title and text columns for analysis
-        df['combined_text'] = df['title'] + ' ' + df['text']
-
-        # Process each article
-        word_counts = Counter()
-
-        for text in df['combined_text']:
-            words = tokenize_and_filter(text)
-            if words:  # Check if any words remain after filtering
-                word_counts.update(words)
-
-        return word_counts
+        # Articles are tokenized once into the shared document-term matrix;
+        # any date range is then a sum over its rows
+        matrix = load_store(articles_csv=Path(csv_file))
+        return matrix.frequencies(matrix.mask(start=start, end=end, source='article'))
 
     except Exception as e:
         print(f"Error processing CSV file: {str(e)}")
@@ -84,6 +57,11 @@ def create_visualizations(combined_counts, output_dir="output"):
     plt.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Word frequency figures for Vox articles")
+    parser.add_argument("--start", type=str, help="first publication date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, help="last publication date to include (YYYY-MM-DD)")
+    args = parser.parse_args()
+
     # Set up file paths 
     csv_file = "../../data/vox_articles/2024_all_vox_articles.csv"
     output_dir = "../../figures"
@@ -93,7 +71,7 @@ def main():
         setup_nltk()
 
         # Process CSV data
-        word_counts = process_csv_data(csv_file)
+        word_counts = process_csv_data(csv_file, args.start, args.end)
 
         if not word_counts:
             print("No valid text was processed.")
@@ -1,15 +1,16 @@
+import argparse
 import os
-import re
-from collections import Counter
+import sys
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import pandas as pd
 import seaborn as sns
-from nltk.corpus import stopwords
-from docx import Document
 import nltk
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'shared'))
+from doc_term_matrix import load_store
+
 def setup_nltk():
     """Download required NLTK data if not already present."""
     try:
@@ -17,33 +18,13 @@ def setup_nltk():
     except LookupError:
         nltk.download('stopwords', quiet=True)
 
-def tokenize_and_filter(text):
-    """Clean, tokenize, and remove stop words from text."""
-    stop_words = set(stopwords.words('english'))
-    text = re.sub(r'\W+', ' ', text)  # Remove non-word characters
-    tokens = text.lower().split()
-    return [word for word in tokens if word not in stop_words and len(word) > 1]
-
-def process_docx_files(directory):
-    """Process all .docx files in the directory and return word counts."""
-    directory_path = Path(directory)
-    word_counts = {}
-
-    if not directory_path.exists():
-        raise FileNotFoundError(f"Directory not found: {directory}")
-
-    for filepath in directory_path.glob("*.docx"):
-        try:
-            doc = Document(filepath)
-            text = " ".join(paragraph.text for paragraph in doc.paragraphs)
-            words = tokenize_and_filter(text)
-
-            if words:  # Check if any words remain after filtering
-                word_counts[filepath.name] = Counter(words)
-        except Exception as e:
-            print(f"Error processing {filepath.name}: {str(e)}")
-
-    return word_counts
+def process_docx_files(directory, start=None, end=None):
+    """Return combined word counts of the episodes between start and end, and how many there were."""
+    # Transcripts are tokenized once into the shared document-term matrix;
+    # any date range is then a sum over its rows
+    matrix = load_store(transcript_dir=Path(directory))
+    episodes = matrix.mask(start=start, end=end, source='podcast')
+    return matrix.frequencies(episodes), int(episodes.sum())
 
 def create_visualizations(combined_counts, output_dir="output"):
     """Create and save word frequency visualizations."""
@@ -69,6 +50,11 @@ def create_visualizations(combined_counts, output_dir="output"):
     plt.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Word frequency figures for Vox podcasts")
+    parser.add_argument("--start", type=str, help="first episode date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, help="last episode date to include (YYYY-MM-DD)")
+    args = parser.parse_args()
+
     # Set up file paths
     directory = "../../data/vox_podcasts/2024/"
     output_dir = "../../figures/"
@@ -78,22 +64,17 @@ def main():
         setup_nltk()
 
         # Process files
-        word_counts = process_docx_files(directory)
+        combined_counts, n_documents = process_docx_files(directory, args.start, args.end)
 
-        if not word_counts:
+        if not combined_counts:
             print("No valid documents were processed.")
             return
 
-        # Combine all word counts
-        combined_counts = Counter()
-        for wc in word_counts.values():
-            combined_counts.update(wc)
-
         # Create visualizations
         create_visualizations(combined_counts, output_dir)
 
         # Print summary statistics
-        print(f"Processed {len(word_counts)} documents")
+        print(f"Processed {n_documents} documents")
         print(f"Total unique words: {len(combined_counts)}")
         print("\nTop 10 most common words:")
         for word, count in combined_counts.most_common(10):
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'code' / 'shared'))
+from run_metrics import NULL_METRICS, RunMetrics
+
+# Bump when the tables below change so old cache entries are ignored
+AGGREGATE_VERSION = 1
+CACHE_DIR = Path(__file__).resolve().parent / 'aggregates'
+
+PERIODS = {'daily': 'D', 'weekly': 'W', 'monthly': 'M'}
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _period_stats(values: pd.Series, keys: pd.Series) -> pd.DataFrame:
+    """mean, count, quartiles, extremes and boxplot whiskers of values per key."""
+    grouped = values.groupby(keys)
+    stats = grouped.agg(['mean', 'count', 'min', 'max'])
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats['q25'], stats['median'], stats['q75'] = quartiles[0.25], quartiles[0.5], quartiles[0.75]
+
+    # Tukey whiskers: the most extreme values within 1.5 IQR of the box
+    iqr = stats['q75'] - stats['q25']
+    lower = (stats['q25'] - 1.5 * iqr).reindex(keys).to_numpy()
+    upper = (stats['q75'] + 1.5 * iqr).reindex(keys).to_numpy()
+    inside = (values.to_numpy() >= lower) & (values.to_numpy() <= upper)
+    stats['whisker_low'] = values[inside].groupby(keys[inside]).min()
+    stats['whisker_high'] = values[inside].groupby(keys[inside]).max()
+    return stats
+
+
+def compute_aggregates(df: pd.DataFrame, date_col: str = 'datetime',
+                       sentiment_col: str = 'sentiment_score',
+                       author_col: str = 'author') -> Dict[str, pd.DataFrame]:
+    """Every table the sentiment plots and statistics read, from one date parse.
+
+    daily/weekly/monthly hold per-period mean, count, quartiles and whiskers
+    (daily also 7- and 30-day rolling means of the daily means), monthly_fliers
+    the boxplot outliers, author the per-author mean and count, and summary
+    the overall mean, median and share of positive articles.
+    """
+    dates = pd.to_datetime(df[date_col], format='mixed')
+    values = df[sentiment_col].astype(float).reset_index(drop=True)
+    dates = dates.reset_index(drop=True)
+
+    tables = {}
+    for name, freq in PERIODS.items():
+        keys = dates.dt.to_period(freq).dt.start_time.rename('period')
+        tables[name] = _period_stats(values, keys)
+
+    daily = tables['daily']
+    daily['rolling_7'] = daily['mean'].rolling(window=7).mean()
+    daily['rolling_30'] = daily['mean'].rolling(window=30).mean()
+
+    monthly = tables['monthly']
+    keys = dates.dt.to_period('M').dt.start_time
+    low = monthly['whisker_low'].reindex(keys).to_numpy()
+    high = monthly['whisker_high'].reindex(keys).to_numpy()
+    outside = (values.to_numpy() < low) | (values.to_numpy() > high)
+    tables['monthly_fliers'] = pd.DataFrame({'period': keys[outside].to_numpy(),
+                                             'value': values[outside].to_numpy()})
+
+    if author_col in df.columns:
+        tables['author'] = (values.groupby(df[author_col].reset_index(drop=True))
+                            .agg(['mean', 'count'])
+                            .rename(columns={'mean': 'mean_sentiment', 'count': 'article_count'}))
+
+    tables['summary'] = pd.DataFrame({
+        'mean': [values.mean()],
+        'median': [values.median()],
+        'pct_positive': [(values > 0).mean() * 100],
+        'count': [len(values)],
+    })
+
+    for name in PERIODS:
+        tables[name] = tables[name].reset_index()
+    if 'author' in tables:
+        tables['author'] = tables['author'].reset_index()
+    return tables
+
+
+def cache_key(path: str, date_col: str, sentiment_col: str) -> str:
+    """Input file hash plus the columns and table version the aggregates came from."""
+    key = f"{file_hash(path)}:{date_col}:{sentiment_col}:{AGGREGATE_VERSION}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def load_aggregates(path: str, df: Optional[pd.DataFrame] = None, date_col: str = 'datetime',
+                    sentiment_col: str = 'sentiment_score', cache_dir: Path = CACHE_DIR,
+                    metrics: RunMetrics = NULL_METRICS) -> Dict[str, pd.DataFrame]:
+    """Aggregates of a scored CSV or Parquet file, read from Parquet if this exact file was seen before.
+
+    On a miss they are computed from df (the already parsed CSV, or the CSV
+    itself when df is None) and written to cache_dir/<stem>_<key>/. Entries
+    are written to a temporary directory and renamed into place, so an
+    interrupted or concurrent run never leaves a partial entry behind.
+    """
+    with metrics.stage('aggregates', path=path) as record:
+        entry = Path(cache_dir) / f"{Path(path).stem}_{cache_key(path, date_col, sentiment_col)}"
+        record['cache_hit'] = entry.is_dir()
+        if entry.is_dir():
+            try:
+                tables = {p.stem: pd.read_parquet(p) for p in entry.glob('*.parquet')}
+                # summary is the last table written, so entries that have it are complete
+                if 'summary' in tables:
+                    return tables
+            except ImportError:
+                pass
+            except (OSError, ValueError):
+                # Unreadable entry (e.g. left by an older, interrupted run); rebuild it
+                shutil.rmtree(entry, ignore_errors=True)
+            record['cache_hit'] = False
+
+        if df is None:
+            df = pd.read_parquet(path) if Path(path).suffix == '.parquet' else pd.read_csv(path)
+            if sentiment_col not in df.columns:
+                df[sentiment_col] = df['pos_score'] - df['neg_score']
+        tables = compute_aggregates(df, date_col, sentiment_col)
+        record['documents'] = len(df)
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        partial = Path(tempfile.mkdtemp(prefix=f".{entry.name}.", dir=entry.parent))
+        try:
+            for name, table in tables.items():
+                table.to_parquet(partial / f"{name}.parquet", index=False)
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(partial, entry)
+        except ImportError:
+            print("pyarrow is not installed; aggregates will be recomputed next time")
+        except OSError:
+            # Another run renamed its (identical) entry into place first
+            pass
+        finally:
+            shutil.rmtree(partial, ignore_errors=True)
+        return tables
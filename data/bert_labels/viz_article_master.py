@@ -1,10 +1,30 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import numpy as np
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sentiment_aggregates import compute_aggregates, load_aggregates
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'code' / 'shared'))
+from run_metrics import NULL_METRICS, RunMetrics
+
+# Batch mode turns these off/over so figures are saved without blocking on a window
+SHOW_FIGURES = True
+FIGURE_DIR = "../../figures/"
+
+# Stage timings go here when run with --metrics
+METRICS: RunMetrics = NULL_METRICS
+
+# Columns the plots and statistics read; everything else (e.g. text) is left on disk
+SCORE_COLUMNS = ['datetime', 'author', 'pos_score', 'neg_score', 'sentiment']
 
 def ensure_dir(directory: str) -> str:
     """Create directory if it doesn't exist and return the path."""
@@ -12,30 +32,35 @@ def ensure_dir(directory: str) -> str:
     dir_path.mkdir(parents=True, exist_ok=True)
     return str(dir_path)
 
-def save_figure(fig: plt.Figure, filename: str, directory: str = "../../figures/") -> None:
-    """Save figure to specified directory with given filename."""
-    save_path = Path(ensure_dir(directory)) / filename
-    fig.savefig(save_path, bbox_inches='tight', dpi=300)
+def save_figure(fig: plt.Figure, filename: str, directory: Optional[str] = None) -> None:
+    """Save figure to specified directory (FIGURE_DIR by default) with given filename."""
+    save_path = Path(ensure_dir(directory or FIGURE_DIR)) / filename
+    with METRICS.stage('save_figure', figure=filename):
+        fig.savefig(save_path, bbox_inches='tight', dpi=300)
     print(f"Figure saved: {save_path}")
 
+def finish_figure(fig: plt.Figure) -> None:
+    """Show the figure interactively, or free it in batch mode."""
+    if SHOW_FIGURES:
+        plt.show()
+    else:
+        plt.close(fig)
+
 def plot_sentiment_trends(df: pd.DataFrame,
                          date_col: str = 'datetime',
                          sentiment_col: str = 'sentiment_score',
-                         figsize: tuple = (15, 6)) -> None:
+                         figsize: tuple = (15, 6),
+                         aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Plot sentiment trends with daily values and rolling averages."""
-    fig = plt.figure(figsize=figsize)
+    daily = (aggregates or compute_aggregates(df, date_col, sentiment_col))['daily']
 
-    daily_sentiment = df.groupby(pd.to_datetime(df[date_col]).dt.date)[sentiment_col].mean().reset_index()
-    daily_sentiment.set_index(date_col, inplace=True)
-
-    rolling_7day = daily_sentiment[sentiment_col].rolling(window=7).mean()
-    rolling_30day = daily_sentiment[sentiment_col].rolling(window=30).mean()
+    fig = plt.figure(figsize=figsize)
 
-    plt.plot(daily_sentiment.index, daily_sentiment[sentiment_col],
+    plt.plot(daily['period'], daily['mean'],
              color='blue', alpha=0.2, linewidth=1, label='Daily')
-    plt.plot(daily_sentiment.index, rolling_7day,
+    plt.plot(daily['period'], daily['rolling_7'],
              color='red', linewidth=2, label='7-day Rolling Average')
-    plt.plot(daily_sentiment.index, rolling_30day,
+    plt.plot(daily['period'], daily['rolling_30'],
              color='green', linewidth=2, label='30-day Rolling Average')
 
     plt.axhline(y=0, color='gray', linestyle='--', alpha=0.3)
@@ -47,7 +72,7 @@ def plot_sentiment_trends(df: pd.DataFrame,
     plt.xticks(rotation=45)
 
     save_figure(fig, "sentiment_trends.png")
-    plt.show()
+    finish_figure(fig)
 
 def plot_sentiment_score_distribution(df: pd.DataFrame,
                                    pos_col: str = 'pos_score',
@@ -66,7 +91,7 @@ def plot_sentiment_score_distribution(df: pd.DataFrame,
     plt.legend()
 
     save_figure(fig, "sentiment_distribution.png")
-    plt.show()
+    finish_figure(fig)
 
 def plot_sentiment_counts(df: pd.DataFrame,
                          sentiment_col: str = 'sentiment',
@@ -82,19 +107,28 @@ def plot_sentiment_counts(df: pd.DataFrame,
     plt.ylabel('Count')
 
     save_figure(fig, "sentiment_counts.png")
-    plt.show()
+    finish_figure(fig)
 
 def plot_monthly_distribution(df: pd.DataFrame,
                             date_col: str = 'datetime',
                             sentiment_col: str = 'sentiment_score',
-                            figsize: tuple = (15, 6)) -> None:
+                            figsize: tuple = (15, 6),
+                            aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Plot monthly sentiment distribution as boxplots."""
-    fig = plt.figure(figsize=figsize)
+    aggregates = aggregates or compute_aggregates(df, date_col, sentiment_col)
+    monthly, fliers = aggregates['monthly'], aggregates['monthly_fliers']
+
+    # Boxes are drawn from the precomputed quartiles and whiskers, not the raw scores
+    stats = [{'label': str(row.period.to_period('M')), 'med': row.median,
+              'q1': row.q25, 'q3': row.q75, 'whislo': row.whisker_low, 'whishi': row.whisker_high,
+              'fliers': fliers.loc[fliers['period'] == row.period, 'value'].to_numpy()}
+             for row in monthly.itertuples()]
 
-    df = df.copy()
-    df['month'] = pd.to_datetime(df[date_col]).dt.to_period('M')
+    fig, ax = plt.subplots(figsize=figsize)
+    boxes = ax.bxp(stats, patch_artist=True, medianprops={'color': '0.25'})
+    for patch, color in zip(boxes['boxes'], sns.color_palette(n_colors=len(stats))):
+        patch.set_facecolor(color)
 
-    sns.boxplot(data=df, x='month', y=sentiment_col)
     plt.title('Monthly Sentiment Distribution', fontsize=14, pad=20)
     plt.xlabel('Month', fontsize=12)
     plt.ylabel('Sentiment Score', fontsize=12)
@@ -102,21 +136,25 @@ def plot_monthly_distribution(df: pd.DataFrame,
     plt.grid(True, alpha=0.2)
 
     save_figure(fig, "monthly_distribution.png")
-    plt.show()
+    finish_figure(fig)
 
 def plot_author_analysis(df: pd.DataFrame,
                         author_col: str = 'author',
                         sentiment_col: str = 'sentiment_score',
                         min_articles: int = 5,
                         top_n: int = 10,
-                        figsize: tuple = (12, 8)) -> None:
+                        figsize: tuple = (12, 8),
+                        aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Plot average sentiment by author."""
     fig = plt.figure(figsize=figsize)
 
-    author_stats = df.groupby(author_col).agg({
-        sentiment_col: ['mean', 'count']
-    }).reset_index()
-    author_stats.columns = [author_col, 'mean_sentiment', 'article_count']
+    if aggregates is not None and 'author' in aggregates:
+        author_stats = aggregates['author'].rename(columns={'author': author_col})
+    else:
+        author_stats = df.groupby(author_col).agg({
+            sentiment_col: ['mean', 'count']
+        }).reset_index()
+        author_stats.columns = [author_col, 'mean_sentiment', 'article_count']
 
     author_stats = author_stats[author_stats['article_count'] >= min_articles]
     author_stats = author_stats.sort_values('mean_sentiment', ascending=True)
@@ -133,36 +171,34 @@ def plot_author_analysis(df: pd.DataFrame,
     plt.grid(True, alpha=0.2)
 
     save_figure(fig, "author_analysis.png")
-    plt.show()
+    finish_figure(fig)
 
 def plot_base_sentiment_trends(df: pd.DataFrame,
                              date_col: str = 'datetime',
                              sentiment_col: str = 'sentiment_score',
-                             figsize: tuple = (15, 8)) -> None:
+                             figsize: tuple = (15, 8),
+                             aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Plot base sentiment trends without rolling averages."""
-    df = df.copy()
-    df[date_col] = pd.to_datetime(df[date_col], format='mixed')
-
-    daily_sentiment = df.groupby(df[date_col].dt.date)[sentiment_col].mean().reset_index()
+    daily = (aggregates or compute_aggregates(df, date_col, sentiment_col))['daily']
 
     fig = plt.figure(figsize=figsize)
 
-    plt.plot(daily_sentiment[date_col], daily_sentiment[sentiment_col],
+    plt.plot(daily['period'], daily['mean'],
              color='blue', linewidth=2, alpha=0.7)
 
     plt.axhline(y=0, color='gray', linestyle='--', alpha=0.3)
 
-    plt.fill_between(daily_sentiment[date_col],
-                     daily_sentiment[sentiment_col],
+    plt.fill_between(daily['period'],
+                     daily['mean'],
                      0,
-                     where=(daily_sentiment[sentiment_col] >= 0),
+                     where=(daily['mean'] >= 0),
                      color='green',
                      alpha=0.2,
                      label='Positive Sentiment')
-    plt.fill_between(daily_sentiment[date_col],
-                     daily_sentiment[sentiment_col],
+    plt.fill_between(daily['period'],
+                     daily['mean'],
                      0,
-                     where=(daily_sentiment[sentiment_col] <= 0),
+                     where=(daily['mean'] <= 0),
                      color='red',
                      alpha=0.2,
                      label='Negative Sentiment')
@@ -179,57 +215,182 @@ def plot_base_sentiment_trends(df: pd.DataFrame,
                 fontsize=8, alpha=0.7)
 
     save_figure(fig, "base_sentiment_trends.png")
-    plt.show()
+    finish_figure(fig)
 
 def print_sentiment_analysis(df: pd.DataFrame,
                            date_col: str = 'datetime',
                            sentiment_col: str = 'sentiment_score',
-                           author_col: str = 'author') -> None:
+                           author_col: str = 'author',
+                           aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Print sentiment analysis statistics."""
-    df = df.copy()
-    df['month'] = pd.to_datetime(df[date_col]).dt.to_period('M')
+    summary = (aggregates or compute_aggregates(df, date_col, sentiment_col, author_col))['summary'].iloc[0]
 
     print("\nSentiment Analysis Summary:")
-    print(f"Overall average sentiment: {df[sentiment_col].mean():.3f}")
-    print(f"Median sentiment: {df[sentiment_col].median():.3f}")
-    print(f"Percentage of positive articles: {(df[sentiment_col] > 0).mean() * 100:.1f}%")
+    print(f"Overall average sentiment: {summary['mean']:.3f}")
+    print(f"Median sentiment: {summary['median']:.3f}")
+    print(f"Percentage of positive articles: {summary['pct_positive']:.1f}%")
+
+def load_scores(path: str) -> pd.DataFrame:
+    """Read a scored corpus (CSV or Parquet) once: parse datetimes and add sentiment_score."""
+    with METRICS.stage('load_scores', path=path) as record:
+        if Path(path).suffix == '.parquet':
+            import pyarrow.parquet as pq
+            present = set(pq.read_schema(path).names)
+            df = pd.read_parquet(path, columns=[c for c in SCORE_COLUMNS if c in present])
+        else:
+            header = pd.read_csv(path, nrows=0).columns
+            df = pd.read_csv(path, usecols=[c for c in SCORE_COLUMNS if c in header])
+        # Convert datetime string to datetime object
+        df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
+
+        # Calculate sentiment score
+        df['sentiment_score'] = df['pos_score'] - df['neg_score']
+        record['documents'] = len(df)
+    return df
+
+# Every figure analyze_sentiment draws, by name
+FIGURES = {
+    'sentiment_distribution': plot_sentiment_score_distribution,
+    'sentiment_counts': plot_sentiment_counts,
+    'base_sentiment_trends': plot_base_sentiment_trends,
+    'sentiment_trends': plot_sentiment_trends,
+    'monthly_distribution': plot_monthly_distribution,
+    'author_analysis': plot_author_analysis,
+}
+
+# Figures drawn from the precomputed aggregate tables rather than the raw scores
+AGGREGATE_FIGURES = {'base_sentiment_trends', 'sentiment_trends', 'monthly_distribution', 'author_analysis'}
+
+# Parsed corpora, their aggregates and where their figures go in a batch worker process,
+# set once by _init_worker
+_frames: Dict[str, pd.DataFrame] = {}
+_aggregates: Dict[str, Dict[str, pd.DataFrame]] = {}
+_figure_dirs: Dict[str, str] = {}
+
+def _init_worker(frames: Dict[str, pd.DataFrame], aggregates: Dict[str, Dict[str, pd.DataFrame]],
+                 figure_dirs: Dict[str, str], metrics: RunMetrics = NULL_METRICS) -> None:
+    """Headless setup for a render process; the DataFrames arrive once per worker.
+
+    Pool workers log nothing themselves; their render times are returned
+    and recorded by the parent.
+    """
+    global SHOW_FIGURES, METRICS, _frames, _aggregates, _figure_dirs
+    plt.switch_backend('Agg')
+    SHOW_FIGURES = False
+    METRICS = metrics
+    _frames = frames
+    _aggregates = aggregates
+    _figure_dirs = figure_dirs
+
+def _render(task: Tuple[str, str]) -> Tuple[str, str, float]:
+    """Draw and save one figure of one corpus, returning how long it took."""
+    global FIGURE_DIR
+    corpus, figure = task
+    FIGURE_DIR = _figure_dirs[corpus]
+    start = time.perf_counter()
+    kwargs = {'aggregates': _aggregates[corpus]} if figure in AGGREGATE_FIGURES else {}
+    FIGURES[figure](_frames[corpus], **kwargs)
+    return corpus, figure, time.perf_counter() - start
+
+def corpus_names(inputs: List[str]) -> List[str]:
+    """A distinct name per input: its stem, prefixed by its position if another input shares it."""
+    stems = [Path(p).stem for p in inputs]
+    return [stem if stems.count(stem) == 1 else f"{i}_{stem}" for i, stem in enumerate(stems)]
+
+def render_batch(inputs: List[str], output_dir: str = FIGURE_DIR,
+                 workers: Optional[int] = None) -> Dict[Tuple[str, str], float]:
+    """Render every figure of every scored corpus headlessly across a process pool.
+
+    Each CSV is parsed once here, its aggregate tables loaded from (or added
+    to) the cache, and both shipped to each worker once; figures go
+    to output_dir, or output_dir/<corpus> when there are several corpora
+    (see corpus_names).
+    Returns the render time of every (corpus, figure).
+    """
+    plt.switch_backend('Agg')
+    paths = dict(zip(corpus_names(inputs), inputs))
+    frames = {name: load_scores(p) for name, p in paths.items()}
+    aggregates = {name: load_aggregates(p, frames[name], metrics=METRICS) for name, p in paths.items()}
+    figure_dirs = {name: str(Path(output_dir) / name) if len(frames) > 1 else output_dir
+                   for name in frames}
+    tasks = [(name, figure) for name in frames for figure in FIGURES]
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(frames, aggregates, figure_dirs)) as pool:
+            results = list(pool.map(_render, tasks))
+    else:
+        _init_worker(frames, aggregates, figure_dirs, METRICS)
+        results = [_render(task) for task in tasks]
+    for corpus, figure, seconds in results:
+        METRICS.record('render', seconds, corpus=corpus, figure=figure, workers=workers)
+
+    for name, df in frames.items():
+        print(f"\n{name}:", end="")
+        print_sentiment_analysis(df, aggregates=aggregates[name])
+    return {(corpus, figure): seconds for corpus, figure, seconds in results}
 
 def analyze_sentiment(df: pd.DataFrame,
                      date_col: str = 'datetime',
                      sentiment_col: str = 'sentiment_score',
-                     author_col: str = 'author') -> None:
+                     author_col: str = 'author',
+                     aggregates: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Run complete sentiment analysis with all plots and statistics."""
+    # Dates are parsed and grouped once for every time series plot below
+    aggregates = aggregates or compute_aggregates(df, date_col, sentiment_col, author_col)
+
     # Distribution plots
     plot_sentiment_score_distribution(df)
     plot_sentiment_counts(df)
 
     # Time series plots
-    plot_base_sentiment_trends(df, date_col, sentiment_col)
-    plot_sentiment_trends(df, date_col, sentiment_col)
-    plot_monthly_distribution(df, date_col, sentiment_col)
+    plot_base_sentiment_trends(df, date_col, sentiment_col, aggregates=aggregates)
+    plot_sentiment_trends(df, date_col, sentiment_col, aggregates=aggregates)
+    plot_monthly_distribution(df, date_col, sentiment_col, aggregates=aggregates)
 
     # Author analysis
-    plot_author_analysis(df, author_col, sentiment_col)
+    plot_author_analysis(df, author_col, sentiment_col, aggregates=aggregates)
 
     # Print statistics
-    print_sentiment_analysis(df, date_col, sentiment_col, author_col)
+    print_sentiment_analysis(df, date_col, sentiment_col, author_col, aggregates=aggregates)
 
 if __name__ == "__main__":
-    try:
+    parser = argparse.ArgumentParser(description="Sentiment figures for scored Vox articles")
+    parser.add_argument("--input", action="append",
+                        help="scored CSV or .parquet (repeat for several corpora; "
+                             "default: vox_articles_longform.csv)")
+    parser.add_argument("--batch", action="store_true",
+                        help="render headlessly (no windows) in parallel and report render times")
+    parser.add_argument("--workers", type=int, help="render processes in batch mode")
+    parser.add_argument("--output-dir", type=str, default=FIGURE_DIR)
+    parser.add_argument("--metrics", type=str,
+                        help="append per-stage timings and counts to this JSON-lines file")
+    parser.add_argument("--profile-stage", type=str, choices=["load_scores", "aggregates", "save_figure"],
+                        help="also run this stage under cProfile (in this process only)")
+    args = parser.parse_args()
+    inputs = args.input or ['vox_articles_longform.csv']
+    METRICS = RunMetrics(args.metrics, profile_stage=args.profile_stage)
 
-        df = pd.read_csv('vox_articles_longform.csv')
-        # Convert datetime string to datetime object
-        df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
-
-        # Calculate sentiment score
-        df['sentiment_score'] = df['pos_score'] - df['neg_score']
-
-        # df = pd.read_csv("../../data/bert_labels/vox_articles_longform.csv")
-
-        # Run analysis
-        analyze_sentiment(df)
+    try:
+        if args.batch:
+            start = time.perf_counter()
+            timings = render_batch(inputs, args.output_dir, args.workers)
+            print("\nRender times:")
+            for (corpus, figure), seconds in timings.items():
+                print(f"  {corpus:30s} {figure:24s} {seconds:6.2f}s")
+            print(f"Total wall time: {time.perf_counter() - start:.2f}s "
+                  f"(sum of figures: {sum(timings.values()):.2f}s)")
+        else:
+            FIGURE_DIR = args.output_dir
+            df = load_scores(inputs[0])
+
+            # Run analysis
+            analyze_sentiment(df, aggregates=load_aggregates(inputs[0], df, metrics=METRICS))
 
     except FileNotFoundError:
         print("Please provide the correct path to your data file.")
     except Exception as e:
         print(f"An error occurred: {str(e)}")
+    finally:
+        METRICS.close()